@@ -21,6 +21,7 @@ if DATABASE_URL.startswith('sqlite'):
         DATABASE_URL,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
+        insertmanyvalues_page_size=1000,
         echo=False  # Set to True for SQL debugging
     )
 else:
@@ -28,6 +29,7 @@ else:
     engine = create_engine(
         DATABASE_URL,
         pool_pre_ping=True,
+        insertmanyvalues_page_size=1000,
         echo=False  # Set to True for SQL debugging
     )
 
@@ -60,12 +62,28 @@ def init_database():
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
+
+        # create_all skips tables that already exist; column and index
+        # changes to those are Alembic revisions (migrations/)
+        run_migrations()
         logger.info("Database tables created successfully")
         
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
 
+def run_migrations():
+    """
+    Upgrade the database to the latest Alembic revision
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alembic.ini'))
+    with engine.begin() as conn:
+        config.attributes['connection'] = conn
+        command.upgrade(config, 'head')
+
 def get_database_info():
     """
     Get database connection information for health checks
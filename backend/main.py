@@ -7,7 +7,11 @@ import uuid
 import logging
 import tempfile
 import asyncio
+import functools
+import multiprocessing
 import requests
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from dotenv import load_dotenv
 from fastapi import FastAPI, File, UploadFile, HTTPException, Path as FastApiPath, Body, Request, Form, Query, Depends, Header
@@ -36,11 +40,11 @@ from typing import Dict, Any, List, Optional, Union
 from pydantic import BaseModel, Field
 from datetime import datetime
 from video_segmentation import (
-    generate_scene_segments,
+    generate_all_scene_segments,
     regenerate_scene_segments,
     VideoSegmentationError
 )
-from video_export import export_timeline_to_mp4, VideoExportError, get_export_filename
+from video_export import export_timeline_to_mp4, stream_timeline_to_mp4, VideoExportError, get_export_filename
 
 # Database and transcript service imports
 from database import init_database, get_database_info, get_db
@@ -81,21 +85,59 @@ else:
 
 PYTHON_EXECUTABLE = sys.executable
 
+# Run the analysis pipeline in-process (in a worker pool) instead of spawning
+# a fresh interpreter per upload. The analysis modules import each other as
+# top-level modules, so their directory goes on sys.path; spawned workers
+# inherit it.
+if VIDEO_ANALYSIS_DIR not in sys.path:
+    sys.path.insert(0, VIDEO_ANALYSIS_DIR)
+try:
+    from analyze_video import analyze_video as run_video_analysis
+    VIDEO_ANALYSIS_AVAILABLE = True
+except ImportError as e:
+    logger.error(f"Video analysis pipeline could not be imported: {e}")
+    VIDEO_ANALYSIS_AVAILABLE = False
+
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '2'))
+_analysis_executor: Optional[ProcessPoolExecutor] = None
+
+def get_analysis_executor() -> ProcessPoolExecutor:
+    """Persistent worker pool for video analysis, created on first use."""
+    global _analysis_executor
+    if _analysis_executor is None:
+        # Spawn, not fork: forking this multi-threaded server could hand a
+        # worker a lock (DB, logging, HTTP client) held by another thread
+        _analysis_executor = ProcessPoolExecutor(
+            max_workers=ANALYSIS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _analysis_executor
+
+async def run_analysis_in_pool(video_path: str, segmentation_method: str) -> Optional[Dict[str, Any]]:
+    """Run analyze_video in the worker pool, rebuilding the pool if a worker died."""
+    global _analysis_executor
+    job = functools.partial(
+        run_video_analysis,
+        video_path,
+        scene_threshold=27.0,
+        fade_threshold=5.0,
+        segmentation_method=segmentation_method
+    )
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_analysis_executor(), job)
+    except BrokenProcessPool:
+        logger.warning("Video analysis worker pool broke, restarting it")
+        _analysis_executor = None
+        return await loop.run_in_executor(get_analysis_executor(), job)
+
 # Cloud Storage Configuration
 CLOUD_STORAGE_ENABLED = os.getenv('CLOUD_STORAGE_ENABLED', 'false').lower() == 'true'
 GCS_BUCKET_NAME = os.getenv('GCS_BUCKET_NAME', '')
 GCP_PROJECT_ID = os.getenv('GCP_PROJECT_ID', '')
 
-# Initialize Google Cloud Storage client if available
+# Google Cloud Storage client, created at app startup if available
 storage_client = None
-if GOOGLE_CLOUD_AVAILABLE and CLOUD_STORAGE_ENABLED and GCS_BUCKET_NAME:
-    try:
-        storage_client = storage.Client(project=GCP_PROJECT_ID)
-        bucket = storage_client.bucket(GCS_BUCKET_NAME)
-        logger.info(f"Google Cloud Storage initialized with bucket: {GCS_BUCKET_NAME}")
-    except Exception as e:
-        logger.error(f"Failed to initialize Google Cloud Storage: {e}")
-        storage_client = None
 
 # --- Pydantic Models for Request Bodies ---
 class GoogleAuthRequest(BaseModel):
@@ -136,15 +178,8 @@ class AudioTranslationRequest(BaseModel):
     sceneId: str = Field(..., description="Scene ID for tracking")
     analysisId: str = Field(..., description="Analysis ID for the video")
 
-# Initialize database
-try:
-    init_database()
-    logger.info("Database initialized successfully")
-except Exception as e:
-    logger.error(f"Database initialization failed: {e}")
-
-# Initialize transcript service
-transcript_service = TranscriptService()
+# Transcript service, created at app startup
+transcript_service: Optional[TranscriptService] = None
 
 # --- FastAPI App ---
 app = FastAPI(
@@ -153,6 +188,42 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Database, transcript service and cloud storage are set up at startup, not
+# import: spawned analysis workers re-import this file (as __mp_main__ under
+# `python main.py`) and must not run migrations or open clients
+@app.on_event("startup")
+def startup_services():
+    global transcript_service, storage_client
+
+    # Initialize database
+    try:
+        init_database()
+        logger.info("Database initialized successfully")
+    except Exception as e:
+        logger.error(f"Database initialization failed: {e}")
+
+    # Initialize transcript service
+    transcript_service = TranscriptService()
+
+    # Initialize Google Cloud Storage client if available
+    if GOOGLE_CLOUD_AVAILABLE and CLOUD_STORAGE_ENABLED and GCS_BUCKET_NAME:
+        try:
+            storage_client = storage.Client(project=GCP_PROJECT_ID)
+            logger.info(f"Google Cloud Storage initialized with bucket: {GCS_BUCKET_NAME}")
+        except Exception as e:
+            logger.error(f"Failed to initialize Google Cloud Storage: {e}")
+            storage_client = None
+
+@app.on_event("shutdown")
+async def shutdown_transcript_service():
+    if transcript_service is not None:
+        await transcript_service.aclose()
+
+@app.on_event("shutdown")
+def shutdown_analysis_executor():
+    if _analysis_executor is not None:
+        _analysis_executor.shutdown(wait=False, cancel_futures=True)
+
 @app.get("/")
 def read_root():
     return {"message": "Insomnia Video Editor API", "version": "1.0.0", "status": "running"}
@@ -659,67 +730,40 @@ async def analyze_video_endpoint(request: Request, video: UploadFile = File(...)
             with open(temp_upload_path_on_server, "wb") as buffer:
                 shutil.copyfileobj(video.file, buffer)
 
-            # Verify the analysis script exists before running
-            if not os.path.exists(ANALYZE_VIDEO_SCRIPT):
-                error_msg = f"Video analysis script not found at: {ANALYZE_VIDEO_SCRIPT}"
-                logger.error(error_msg)
-                raise HTTPException(status_code=500, detail=error_msg)
-
-        command = [
-            PYTHON_EXECUTABLE,
-            ANALYZE_VIDEO_SCRIPT,
-            "--input", temp_upload_path_on_server,
-            "--fade-threshold", "5.0",
-            "--segmentation-method", segmentation_method
-        ]
-
-        # Debug: Log the command being executed
-        logger.info(f"DEBUG: Executing command: {' '.join(command)}")
-        logger.info(f"DEBUG: Working directory: {VIDEO_ANALYSIS_DIR}")
-        logger.info(f"DEBUG: Script exists: {os.path.exists(ANALYZE_VIDEO_SCRIPT)}")
-
-        process = subprocess.run(
-            command, capture_output=True, text=True, cwd=VIDEO_ANALYSIS_DIR, check=False
-        )
+        if not VIDEO_ANALYSIS_AVAILABLE:
+            error_msg = f"Video analysis pipeline not available in: {VIDEO_ANALYSIS_DIR}"
+            logger.error(error_msg)
+            raise HTTPException(status_code=500, detail=error_msg)
 
-        # Debug: Log subprocess output
-        logger.info(f"DEBUG: Subprocess return code: {process.returncode}")
-        logger.info(f"DEBUG: Subprocess stderr: {process.stderr[:1000]}")
-        logger.info(f"DEBUG: Subprocess stdout length: {len(process.stdout)}")
+        logger.info(f"DEBUG: Running video analysis for {temp_upload_path_on_server} ({segmentation_method})")
+        full_analysis_result = await run_analysis_in_pool(temp_upload_path_on_server, segmentation_method)
 
-        if process.returncode != 0:
-            error_message = f"Video analysis script failed. Stderr: {process.stderr[:500]}..."
-            print(f"Error running analysis script (ID: {analysis_id}): {process.stderr}", file=sys.stderr)
+        if not full_analysis_result:
+            error_message = "Video analysis failed. See server logs for details."
+            print(f"Error running video analysis (ID: {analysis_id})", file=sys.stderr)
             raise HTTPException(status_code=500, detail=error_message)
 
-        try:
-            full_analysis_result = json.loads(process.stdout)
-
-            # Debug: Log analysis result details
-            logger.info(f"DEBUG: Analysis result contains {len(full_analysis_result.get('scenes', []))} scenes")
-            if "scenes" in full_analysis_result and len(full_analysis_result["scenes"]) > 0:
-                first_scene = full_analysis_result["scenes"][0]
-                logger.info(f"DEBUG: First scene segmentation_method: {first_scene.get('segmentation_method', 'NOT_SET')}")
-                logger.info(f"DEBUG: First scene transition_type: {first_scene.get('transition_type', 'NOT_SET')}")
-
-            if "scenes" in full_analysis_result:
-                for i, scene_data in enumerate(full_analysis_result["scenes"]):
-                    scene_data.setdefault("title", f"Scene {scene_data.get('scene_index', i) + 1}")
-                    scene_data.setdefault("tags", [])
-                    scene_data["sceneId"] = str(uuid.uuid4()) # Add UUID for each scene
-                    # Ensure scene_index is present, if analyze_video.py doesn't add it consistently
-                    if "scene_index" not in scene_data:
-                        scene_data["scene_index"] = i
-
-                    # Add original timing metadata for trimming support
-                    scene_data["start_original"] = scene_data.get("start", 0)
-                    scene_data["end_original"] = scene_data.get("end", 0)
-                    scene_data["current_trimmed_start"] = 0.0
-                    scene_data["current_trimmed_duration"] = scene_data.get("duration", 0)
-        except json.JSONDecodeError:
-            error_message = f"Failed to parse JSON from analysis script. Output: {process.stdout[:500]}..."
-            print(error_message, file=sys.stderr)
-            raise HTTPException(status_code=500, detail=error_message)
+        # Debug: Log analysis result details
+        logger.info(f"DEBUG: Analysis result contains {len(full_analysis_result.get('scenes', []))} scenes")
+        if "scenes" in full_analysis_result and len(full_analysis_result["scenes"]) > 0:
+            first_scene = full_analysis_result["scenes"][0]
+            logger.info(f"DEBUG: First scene segmentation_method: {first_scene.get('segmentation_method', 'NOT_SET')}")
+            logger.info(f"DEBUG: First scene transition_type: {first_scene.get('transition_type', 'NOT_SET')}")
+
+        if "scenes" in full_analysis_result:
+            for i, scene_data in enumerate(full_analysis_result["scenes"]):
+                scene_data.setdefault("title", f"Scene {scene_data.get('scene_index', i) + 1}")
+                scene_data.setdefault("tags", [])
+                scene_data["sceneId"] = str(uuid.uuid4()) # Add UUID for each scene
+                # Ensure scene_index is present, if analyze_video.py doesn't add it consistently
+                if "scene_index" not in scene_data:
+                    scene_data["scene_index"] = i
+
+                # Add original timing metadata for trimming support
+                scene_data["start_original"] = scene_data.get("start", 0)
+                scene_data["end_original"] = scene_data.get("end", 0)
+                scene_data["current_trimmed_start"] = 0.0
+                scene_data["current_trimmed_duration"] = scene_data.get("duration", 0)
 
         shutil.move(temp_upload_path_on_server, stored_video_path_on_server)
 
@@ -727,28 +771,24 @@ async def analyze_video_endpoint(request: Request, video: UploadFile = File(...)
         logger.info(f"Generating video segments for {len(full_analysis_result.get('scenes', []))} scenes")
 
         if "scenes" in full_analysis_result:
-            for scene_data in full_analysis_result["scenes"]:
-                try:
-                    # Generate proxy and mezzanine segments for this scene
-                    generated_segments = generate_scene_segments(
-                        analysis_id,
-                        stored_video_path_on_server,
-                        scene_data,
-                        ANALYZED_VIDEOS_DIR,
-                        generate_proxy=True,
-                        generate_mezzanine=True
-                    )
-
+            scenes = full_analysis_result["scenes"]
+            # Scenes are encoded concurrently; failures are logged per scene
+            # and the remaining scenes still get their segments
+            all_generated = await asyncio.to_thread(
+                generate_all_scene_segments,
+                analysis_id,
+                stored_video_path_on_server,
+                scenes,
+                ANALYZED_VIDEOS_DIR,
+                generate_proxy=True,
+                generate_mezzanine=True
+            )
+            for scene_data, generated_segments in zip(scenes, all_generated):
+                if generated_segments:
                     # Update scene data with segment URLs
                     scene_data.update(generated_segments)
                     logger.info(f"Generated segments for scene {scene_data.get('sceneId')}: {list(generated_segments.keys())}")
 
-                except VideoSegmentationError as e:
-                    logger.error(f"Failed to generate segments for scene {scene_data.get('sceneId')}: {e}")
-                    # Continue with other scenes even if one fails
-                except Exception as e:
-                    logger.error(f"Unexpected error generating segments for scene {scene_data.get('sceneId')}: {e}")
-
         base_url = str(request.base_url).rstrip('/')
         relative_api_path = f"/api/video/{analysis_id}"
         absolute_video_url = f"{base_url}{relative_api_path}"
@@ -1237,6 +1277,34 @@ async def export_timeline_video(export_data: TimelineExportData = Body(...)):
         logger.error(f"Unexpected error during video export: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
+@app.post("/api/export/video/stream")
+async def stream_timeline_video(export_data: TimelineExportData = Body(...)):
+    """
+    Export timeline data and stream the MP4 straight back in the response
+    (fragmented MP4), without writing an export file on the server.
+    """
+    analysis_data = load_analysis_data(export_data.analysis_id)
+    if not analysis_data:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    try:
+        chunks = stream_timeline_to_mp4(
+            export_data.timeline_data,
+            export_data.analysis_id,
+            ANALYZED_VIDEOS_DIR,
+            export_data.composition_settings
+        )
+    except VideoExportError as e:
+        logger.error(f"Video export error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+
+    output_filename = get_export_filename(export_data.analysis_id, export_data.export_name)
+    return StreamingResponse(
+        chunks,
+        media_type="video/mp4",
+        headers={"Content-Disposition": f"attachment; filename={output_filename}"}
+    )
+
 # NEW: Export download endpoint
 @app.get("/api/export/{analysis_id}/{filename}")
 @app.head("/api/export/{analysis_id}/{filename}")
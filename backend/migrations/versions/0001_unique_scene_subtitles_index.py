@@ -0,0 +1,54 @@
+"""Make idx_scene_subtitles unique and drop the column-level scene_id index
+
+There is one cached subtitle row per scene. Databases created before this
+change have a non-unique idx_scene_subtitles plus the redundant
+ix_scene_subtitles_scene_id from scene_id's index=True. Fresh databases
+built by create_all already have the unique index, so this is a no-op there.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 23:01:20
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('scene_subtitles'):
+        return
+    indexes = {ix['name']: ix for ix in inspector.get_indexes('scene_subtitles')}
+
+    if 'ix_scene_subtitles_scene_id' in indexes:
+        op.drop_index('ix_scene_subtitles_scene_id', table_name='scene_subtitles')
+
+    scene_index = indexes.get('idx_scene_subtitles')
+    if scene_index is not None and scene_index['unique']:
+        return
+    if scene_index is not None:
+        op.drop_index('idx_scene_subtitles', table_name='scene_subtitles')
+
+    # Rows are a regenerable cache; keep one per scene so the index can build
+    op.execute(
+        "DELETE FROM scene_subtitles WHERE id NOT IN "
+        "(SELECT MIN(id) FROM scene_subtitles GROUP BY scene_id)"
+    )
+    op.create_index('idx_scene_subtitles', 'scene_subtitles', ['scene_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_scene_subtitles', table_name='scene_subtitles')
+    op.create_index('idx_scene_subtitles', 'scene_subtitles', ['scene_id'])
+    op.create_index('ix_scene_subtitles_scene_id', 'scene_subtitles', ['scene_id'])
@@ -0,0 +1,38 @@
+"""Add idx_segment_type_start for sentence lookups by scene
+
+Scene subtitles read the sentence rows of one transcript in start_time
+order; (transcript_id, segment_type, start_time) serves that as a single
+index range.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 23:01:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('transcript_segments'):
+        return
+    if 'idx_segment_type_start' in {ix['name'] for ix in inspector.get_indexes('transcript_segments')}:
+        return
+    op.create_index('idx_segment_type_start', 'transcript_segments',
+                    ['transcript_id', 'segment_type', 'start_time'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_segment_type_start', table_name='transcript_segments')
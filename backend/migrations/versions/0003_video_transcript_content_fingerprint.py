@@ -0,0 +1,49 @@
+"""Add content_hash and content_size to video_transcripts
+
+Transcripts of byte-identical re-uploads are reused. content_size narrows
+the lookup so only uploads matching a stored size are hashed up front;
+content_hash confirms the match.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15 23:05:23
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('video_transcripts'):
+        return
+    columns = {c['name'] for c in inspector.get_columns('video_transcripts')}
+    indexes = {ix['name'] for ix in inspector.get_indexes('video_transcripts')}
+
+    if 'content_hash' not in columns:
+        op.add_column('video_transcripts', sa.Column('content_hash', sa.String(), nullable=True))
+    if 'content_size' not in columns:
+        op.add_column('video_transcripts', sa.Column('content_size', sa.BigInteger(), nullable=True))
+    if 'idx_content_hash' not in indexes:
+        op.create_index('idx_content_hash', 'video_transcripts', ['content_hash'])
+    if 'idx_content_size' not in indexes:
+        op.create_index('idx_content_size', 'video_transcripts', ['content_size'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_content_size', table_name='video_transcripts')
+    op.drop_index('idx_content_hash', table_name='video_transcripts')
+    with op.batch_alter_table('video_transcripts') as batch_op:
+        batch_op.drop_column('content_size')
+        batch_op.drop_column('content_hash')
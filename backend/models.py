@@ -1,5 +1,5 @@
 # Database models for transcript storage and user management
-from sqlalchemy import Column, String, Float, Integer, Text, DateTime, ForeignKey, JSON, Index, Boolean
+from sqlalchemy import Column, String, Float, Integer, BigInteger, Text, DateTime, ForeignKey, JSON, Index, Boolean
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -102,6 +102,8 @@ class VideoTranscript(Base):
     # Processing metadata
     processing_time_seconds = Column(Integer)
     api_response_id = Column(String)  # AssemblyAI transcript ID
+    content_hash = Column(String)  # blake2b of the video bytes, for re-upload dedup
+    content_size = Column(BigInteger)  # video size in bytes; only same-size uploads get hashed
     status = Column(String, default='completed')
     
     # Timestamps
@@ -117,6 +119,8 @@ class VideoTranscript(Base):
         Index('idx_analysis_id', 'analysis_id'),
         Index('idx_status', 'status'),
         Index('idx_created_at', 'created_at'),
+        Index('idx_content_hash', 'content_hash'),
+        Index('idx_content_size', 'content_size'),
     )
 
 class TranscriptSegment(Base):
@@ -149,6 +153,7 @@ class TranscriptSegment(Base):
         Index('idx_transcript_timing', 'transcript_id', 'start_time', 'end_time'),
         Index('idx_transcript_text', 'transcript_id', 'text'),
         Index('idx_segment_type', 'transcript_id', 'segment_type'),
+        Index('idx_segment_type_start', 'transcript_id', 'segment_type', 'start_time'),
     )
 
 class SceneSubtitle(Base):
@@ -161,7 +166,7 @@ class SceneSubtitle(Base):
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     
     # Scene identification
-    scene_id = Column(String, nullable=False, index=True)
+    scene_id = Column(String, nullable=False)
     
     # Foreign key to transcript
     transcript_id = Column(String, ForeignKey('video_transcripts.id'), nullable=False)
@@ -181,7 +186,7 @@ class SceneSubtitle(Base):
     
     # Indexes
     __table_args__ = (
-        Index('idx_scene_subtitles', 'scene_id'),
+        Index('idx_scene_subtitles', 'scene_id', unique=True),
         Index('idx_transcript_scenes', 'transcript_id'),
         Index('idx_scene_timing', 'scene_start_time', 'scene_end_time'),
     )
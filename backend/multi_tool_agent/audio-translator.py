@@ -1,11 +1,9 @@
 import os
 import uuid
+import functools
 import base64
-import wave
-# Disable MoviePy progress bars to prevent tqdm issues in subprocess
-os.environ['MOVIEPY_PROGRESS_BAR'] = '0'
-from moviepy.editor import VideoFileClip, AudioFileClip
-from pydub import AudioSegment
+import subprocess
+import tempfile
 from google.cloud import speech, translate_v2 as translate
 from google import genai
 from dotenv import load_dotenv
@@ -18,60 +16,75 @@ def unique_id():
 def unique_file(prefix, suffix):
     return f"{prefix}_{uuid.uuid4().hex[:8]}.{suffix}"
 
-class AudioExtractorAgent:
-    def run(self, input_video_path: str) -> str:
-        print(f"[Pipeline] Starting audio extraction from: {input_video_path}")
-        clip = VideoFileClip(input_video_path)
-        audio_path = unique_file("extracted_audio", "wav")
-        clip.audio.write_audiofile(audio_path, verbose=False, logger=None)
-        print(f"[Pipeline] Extracted audio saved at: {audio_path}")
-        return audio_path
-
-class SpeechToTextAgent:
-    def run(self, audio_path: str) -> str:
-        try:
-            print(f"[Pipeline] Starting speech-to-text for: {audio_path}")
-            client = speech.SpeechClient()
-            sound = AudioSegment.from_file(audio_path).set_channels(1)
-            wav_path = unique_file("converted_audio", "wav")
-            sound.export(wav_path, format="wav")
-
-            with open(wav_path, "rb") as audio_file:
-                content = audio_file.read()
-
-            audio = speech.RecognitionAudio(content=content)
-            config = speech.RecognitionConfig(
-                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-                language_code="en-US"
-            )
+# Internal audio representation shared by extraction and STT: 16 kHz mono s16le.
+# Only the final mux step up-samples to 44.1 kHz stereo for playback.
+INTERNAL_SAMPLE_RATE = 16000
+OUTPUT_SAMPLE_RATE = 44100
+
+# Gemini TTS returns raw 24 kHz mono s16le PCM
+TTS_SAMPLE_RATE = 24000
+TTS_CHANNELS = 1
+
+def extract_audio(input_video_path: str, out_dir: str) -> str:
+    print(f"[Pipeline] Starting audio extraction from: {input_video_path}")
+    audio_path = os.path.join(out_dir, "audio.wav")
+    command = [
+        "ffmpeg", "-y", "-nostdin", "-loglevel", "error",
+        "-i", input_video_path,
+        "-vn",
+        "-acodec", "pcm_s16le",
+        "-ar", str(INTERNAL_SAMPLE_RATE),
+        "-ac", "1",
+        audio_path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg audio extraction failed: {result.stderr}")
+    print(f"[Pipeline] Extracted audio saved at: {audio_path}")
+    return audio_path
+
+def transcribe(audio_path: str) -> str:
+    try:
+        print(f"[Pipeline] Starting speech-to-text for: {audio_path}")
+        client = speech.SpeechClient()
+
+        # The extractor already emits 16 kHz mono LINEAR16, so no re-encode is needed
+        with open(audio_path, "rb") as audio_file:
+            content = audio_file.read()
+
+        audio = speech.RecognitionAudio(content=content)
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=INTERNAL_SAMPLE_RATE,
+            language_code="en-US"
+        )
+
+        response = client.recognize(config=config, audio=audio)
+        transcript = " ".join([result.alternatives[0].transcript for result in response.results])
+        print(f"[Pipeline] Transcribed text: {transcript}")
+        return transcript
+    except Exception as e:
+        print(f"[Pipeline] Error in speech-to-text: {str(e)}")
+        raise
 
-            response = client.recognize(config=config, audio=audio)
-            transcript = " ".join([result.alternatives[0].transcript for result in response.results])
-            print(f"[Pipeline] Transcribed text: {transcript}")
-            return transcript
-        except Exception as e:
-            print(f"[Pipeline] Error in speech-to-text: {str(e)}")
-            raise
-
-class TranslatorAgent:
-    def run(self, text: str, target_language="es") -> str:
-        try:
-            print(f"[Pipeline] Starting translation to {target_language}")
-            client = translate.Client()
-            result = client.translate(text, target_language=target_language)
-            translated = result["translatedText"]
-            print(f"[Pipeline] Translated text ({target_language}): {translated}")
-            return translated
-        except Exception as e:
-            print(f"[Pipeline] Error in translation: {str(e)}")
-            raise
+def translate_text(text: str, target_language="es") -> str:
+    try:
+        print(f"[Pipeline] Starting translation to {target_language}")
+        client = translate.Client()
+        result = client.translate(text, target_language=target_language)
+        translated = result["translatedText"]
+        print(f"[Pipeline] Translated text ({target_language}): {translated}")
+        return translated
+    except Exception as e:
+        print(f"[Pipeline] Error in translation: {str(e)}")
+        raise
 
 class GeminiTextToSpeechAgent:
     def __init__(self, api_key, voice="Kore"):
         self.client = genai.Client(api_key=api_key)
         self.voice = voice
 
-    def run(self, text: str) -> str:
+    def run(self, text: str):
         response = self.client.models.generate_content(
             model="gemini-2.5-flash-preview-tts",
             contents=text,  # single string works fine
@@ -94,58 +107,57 @@ class GeminiTextToSpeechAgent:
         if not data:
             raise RuntimeError("❌ Gemini TTS returned no audio data.")
 
-        output_path = unique_file("translated_speech", "wav")
-        channels = 1
-        rate = 24000
-        sample_width = 2
-
-        with wave.open(output_path, "wb") as wf:
-            wf.setnchannels(channels)
-            wf.setsampwidth(sample_width)
-            wf.setframerate(rate)
-            wf.writeframes(data)
-
-        print(f"[Pipeline] Generated speech audio saved at: {output_path}")
-        return output_path
-
-
-
-class VideoRebuilderAgent:
-    def run(self, video_path: str, translated_audio_path: str) -> str:
-        print("[VideoRebuilderAgent] Rebuilding video with translated audio...")
-
-        video = VideoFileClip(video_path)
-        video_duration = video.duration
-
-        # Load translated audio with pydub
-        translated = AudioSegment.from_file(translated_audio_path)
-
-        # Convert to stereo and 44100 Hz sample rate to avoid playback issues
-        translated = translated.set_channels(2).set_frame_rate(44100)
-
-        translated_duration = translated.duration_seconds
-
-        # Pad if shorter than video
-        if translated_duration < video_duration:
-            padding_ms = int((video_duration - translated_duration) * 1000)
-            silence = AudioSegment.silent(duration=padding_ms)
-            padded = translated + silence
-        else:
-            padded = translated
-
-        # Export the processed audio to a temp wav file
-        padded_audio_path = translated_audio_path.replace(".wav", "_stereo_44100.wav")
-        padded.export(padded_audio_path, format="wav")
-
-        # Attach audio to video with MoviePy
-        audio = AudioFileClip(padded_audio_path)
-        new_video = video.set_audio(audio)
-
-        output_path = f"final_video_{unique_id()}.mp4"
-        new_video.write_videofile(output_path, codec="libx264", audio_codec="aac", verbose=False, logger=None)
+        print(f"[Pipeline] Generated speech audio: {len(data)} bytes of PCM")
+        return data, TTS_SAMPLE_RATE, TTS_CHANNELS
+
+@functools.cache
+def _tts_client(api_key, voice):
+    # Reuse the agent (and its warmed genai channel) for identical key/voice pairs
+    return GeminiTextToSpeechAgent(api_key=api_key, voice=voice)
+
+
+def rebuild_video(video_path: str, translated_audio) -> str:
+    print("[Pipeline] Rebuilding video with translated audio...")
+
+    pcm_data, rate, channels = translated_audio
+    output_path = f"final_video_{unique_id()}.mp4"
+
+    # Single ffmpeg pass: read the raw TTS PCM from stdin, resample it to 44.1 kHz
+    # stereo, pad it with silence up to the video length and mux it with the
+    # original video stream.
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-i", video_path,
+        "-f", "s16le", "-ar", str(rate), "-ac", str(channels), "-i", "pipe:0",
+        "-map", "0:v:0",
+        "-map", "1:a:0",
+        "-filter:a", f"aresample={OUTPUT_SAMPLE_RATE},pan=stereo|c0=c0|c1=c0,apad",
+        "-c:v", "copy",
+        "-c:a", "aac",
+        "-shortest",
+        "-movflags", "+faststart",
+        output_path
+    ]
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        bufsize=1 << 20
+    )
+    try:
+        process.stdin.write(pcm_data)
+    except BrokenPipeError:
+        pass  # ffmpeg exited early; the error is reported from stderr below
+    finally:
+        process.stdin.close()
+    stderr = process.stderr.read()
+    process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"FFmpeg video rebuild failed: {stderr.decode(errors='replace')}")
 
-        print(f"[Pipeline] Final video saved at: {output_path}")
-        return output_path
+    print(f"[Pipeline] Final video saved at: {output_path}")
+    return output_path
 
 
 def process_video_pipeline(video_path: str, target_lang="es", voice="Kore", gemini_api_key=None):
@@ -153,12 +165,13 @@ def process_video_pipeline(video_path: str, target_lang="es", voice="Kore", gemi
         print(f"[Pipeline] Starting pipeline for video: {video_path}")
         print(f"[Pipeline] Target language: {target_lang}, Voice: {voice}")
 
-        audio_path = AudioExtractorAgent().run(video_path)
-        transcript = SpeechToTextAgent().run(audio_path)
-        translated_text = TranslatorAgent().run(transcript, target_lang)
-        tts_agent = GeminiTextToSpeechAgent(api_key=gemini_api_key, voice=voice)
-        translated_audio = tts_agent.run(translated_text)
-        final_video = VideoRebuilderAgent().run(video_path, translated_audio)
+        # The extracted WAV only lives as long as speech-to-text needs it
+        with tempfile.TemporaryDirectory(prefix="translate_") as temp_dir:
+            audio_path = extract_audio(video_path, temp_dir)
+            transcript = transcribe(audio_path)
+        translated_text = translate_text(transcript, target_lang)
+        translated_audio = _tts_client(gemini_api_key, voice).run(translated_text)
+        final_video = rebuild_video(video_path, translated_audio)
         return final_video
     except Exception as e:
         print(f"[Pipeline] Error in pipeline: {str(e)}")
@@ -7,8 +7,8 @@ to help identify bottlenecks and track improvements in video processing operatio
 
 import time
 import logging
-import json
 import os
+import orjson
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
@@ -16,7 +16,7 @@ from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class PerformanceMetric:
     """Data class for storing performance metrics."""
     operation: str
@@ -174,8 +174,8 @@ class PerformanceMonitor:
                 "metrics": [metric.to_dict() for metric in self.metrics]
             }
             
-            with open(self.log_file, 'w') as f:
-                json.dump(metrics_data, f, indent=2)
+            with open(self.log_file, 'wb') as f:
+                f.write(orjson.dumps(metrics_data, option=orjson.OPT_INDENT_2))
                 
             logger.info(f"Saved {len(self.metrics)} metrics to {self.log_file}")
             
@@ -189,8 +189,8 @@ class PerformanceMonitor:
                 logger.info(f"Metrics file {self.log_file} does not exist")
                 return
             
-            with open(self.log_file, 'r') as f:
-                data = json.load(f)
+            with open(self.log_file, 'rb') as f:
+                data = orjson.loads(f.read())
             
             self.metrics = []
             for metric_data in data.get("metrics", []):
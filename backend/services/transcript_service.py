@@ -1,26 +1,252 @@
 # Transcript service for automatic video transcription and storage
 import os
 import asyncio
+import contextlib
+import functools
+import hashlib
 import json
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import requests
+import aiofiles
+import httpx
+from cachetools import TTLCache
+import threading
 import time
+from itertools import islice
+from sqlalchemy import and_, insert, literal, or_, select
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, DATABASE_URL
 from models import VideoTranscript, TranscriptSegment, SceneSubtitle
 
 logger = logging.getLogger(__name__)
 
+# SQLite runs on a single shared connection (StaticPool), so DB work offloaded
+# to worker threads must not interleave there
+_db_lock = threading.Lock() if DATABASE_URL.startswith('sqlite') else contextlib.nullcontext()
+
+# AssemblyAI reports times in milliseconds
+MS_TO_SECONDS = 0.001
+
+# Rows per executemany batch when storing word segments
+SEGMENT_INSERT_BATCH_SIZE = 1000
+
+# In-process scene subtitle cache, keyed by (analysis_id, scene_id)
+SUBTITLE_CACHE_SIZE = 4096
+SUBTITLE_CACHE_TTL_SECONDS = 600
+
+# Subtitle sentences end on terminal punctuation or once they span this long
+SENTENCE_END_PUNCTUATION = ('.', '!', '?')
+SENTENCE_MAX_SECONDS = 5.0
+
+# Read size for streaming video uploads to AssemblyAI and content hashing
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Content hashes kept per (path, size, mtime), so a file is read once
+CONTENT_HASH_CACHE_SIZE = 256
+
+# Transcription status polling: exponential backoff from 0.5s up to 5s
+POLL_TIMEOUT_SECONDS = 300  # 5 minutes max
+POLL_INITIAL_DELAY = 0.5
+POLL_BACKOFF_FACTOR = 1.5
+POLL_MAX_DELAY = 5.0
+
+# Keep-alive pool for AssemblyAI so polls reuse one TLS connection
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=4, max_keepalive_connections=4, keepalive_expiry=30.0)
+
+@functools.lru_cache(maxsize=CONTENT_HASH_CACHE_SIZE)
+def _hash_file(file_path: str, size: int, mtime_ns: int) -> str:
+    """
+    Content fingerprint of a video, used to reuse transcripts of
+    byte-identical re-uploads. size and mtime_ns only key the cache, so a
+    rewritten file is hashed again.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb', buffering=0) as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
 class TranscriptService:
     def __init__(self):
         self.assemblyai_api_key = os.getenv('ASSEMBLYAI_API_KEY', '')
         self.assemblyai_base_url = 'https://api.assemblyai.com/v2'
+        self._client: Optional[httpx.AsyncClient] = None
+        self._subtitle_cache = TTLCache(maxsize=SUBTITLE_CACHE_SIZE, ttl=SUBTITLE_CACHE_TTL_SECONDS)
+        self._subtitle_cache_lock = threading.Lock()
         
         if not self.assemblyai_api_key:
             logger.warning("AssemblyAI API key not configured")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Shared async HTTP client for all AssemblyAI calls
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.assemblyai_base_url,
+                headers={'authorization': self.assemblyai_api_key},
+                limits=HTTP_POOL_LIMITS,
+                timeout=None
+            )
+        return self._client
+
+    async def aclose(self):
+        """
+        Close the shared HTTP client and its pooled connections
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _iter_file_chunks(self, file_path: str, hasher=None):
+        """
+        Stream a file in fixed-size chunks without blocking the event loop.
+        The next chunk is read while the current one is being sent. Chunks
+        are fed to hasher, if given, so the file is hashed in the same read.
+        """
+        async with aiofiles.open(file_path, 'rb') as f:
+            if hasattr(os, 'posix_fadvise'):
+                # Let the kernel read ahead aggressively for this sequential scan
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+            pending = asyncio.ensure_future(f.read(UPLOAD_CHUNK_SIZE))
+            try:
+                while chunk := await pending:
+                    pending = asyncio.ensure_future(f.read(UPLOAD_CHUNK_SIZE))
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    yield chunk
+            finally:
+                if not pending.done():
+                    pending.cancel()
     
+    def _locked(self, func, *args):
+        with _db_lock:
+            return func(*args)
+
+    async def _run_db(self, func, *args):
+        """
+        Run a blocking database function in a worker thread so the event
+        loop keeps serving other requests
+        """
+        return await asyncio.to_thread(self._locked, func, *args)
+
+    def _find_existing_transcript(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Summary of an already stored transcript for an analysis, if any
+        """
+        db = next(get_db())
+        try:
+            existing_transcript = db.query(VideoTranscript).filter(
+                VideoTranscript.analysis_id == analysis_id
+            ).first()
+
+            if not existing_transcript:
+                return None
+
+            return {
+                'transcript_id': existing_transcript.id,
+                'analysis_id': analysis_id,
+                'status': 'already_exists',
+                'segments_count': self._count_word_segments(db, existing_transcript.id)
+            }
+        finally:
+            db.close()
+
+    def _has_transcript_of_size(self, content_size: int, language_code: str) -> bool:
+        """
+        Whether a completed transcript exists for a video of this size, i.e.
+        whether hashing the upload could find an identical one
+        """
+        db = next(get_db())
+        try:
+            return db.query(
+                db.query(VideoTranscript).filter(
+                    VideoTranscript.content_size == content_size,
+                    VideoTranscript.language_code == language_code.replace('-', '_').lower(),
+                    VideoTranscript.status == 'completed'
+                ).exists()
+            ).scalar()
+        finally:
+            db.close()
+
+    def _clone_transcript_by_hash(
+        self,
+        analysis_id: str,
+        content_hash: str,
+        content_size: int,
+        language_code: str,
+        video_path: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Copy an existing transcript of identical video content to a new analysis.
+        Segments are copied server-side with INSERT ... SELECT.
+        """
+        db = next(get_db())
+        try:
+            source = db.query(VideoTranscript).filter(
+                VideoTranscript.content_size == content_size,
+                VideoTranscript.content_hash == content_hash,
+                VideoTranscript.language_code == language_code.replace('-', '_').lower(),
+                VideoTranscript.status == 'completed'
+            ).first()
+
+            if not source:
+                return None
+
+            transcript = VideoTranscript(
+                analysis_id=analysis_id,
+                video_filename=os.path.basename(video_path),
+                video_duration=source.video_duration,
+                language_code=source.language_code,
+                transcription_method=source.transcription_method,
+                confidence_score=source.confidence_score,
+                full_transcript_text=source.full_transcript_text,
+                processing_time_seconds=0,
+                api_response_id=source.api_response_id,
+                content_hash=content_hash,
+                content_size=content_size,
+                status='completed'
+            )
+            db.add(transcript)
+            db.flush()  # Get the ID
+
+            # Segment ids are normally generated in Python; derive unique
+            # ones in SQL from the source ids so no rows leave the database
+            db.execute(
+                insert(TranscriptSegment).from_select(
+                    ['id', 'transcript_id', 'start_time', 'end_time', 'text',
+                     'confidence', 'speaker_label', 'segment_type'],
+                    select(
+                        literal(f"{transcript.id}:") + TranscriptSegment.id,
+                        literal(transcript.id),
+                        TranscriptSegment.start_time,
+                        TranscriptSegment.end_time,
+                        TranscriptSegment.text,
+                        TranscriptSegment.confidence,
+                        TranscriptSegment.speaker_label,
+                        TranscriptSegment.segment_type
+                    ).where(TranscriptSegment.transcript_id == source.id)
+                )
+            )
+            db.commit()
+
+            logger.info(f"Reused transcript of analysis {source.analysis_id} for identical video in {analysis_id}")
+            return {
+                'transcript_id': transcript.id,
+                'analysis_id': analysis_id,
+                'status': 'completed',
+                'segments_count': self._count_word_segments(db, transcript.id),
+                'processing_time': 0
+            }
+
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
     async def transcribe_full_video(
         self, 
         analysis_id: str, 
@@ -36,25 +262,33 @@ class TranscriptService:
             logger.info(f"Starting transcription for analysis {analysis_id}")
             
             # Check if transcript already exists
-            db = next(get_db())
-            try:
-                existing_transcript = db.query(VideoTranscript).filter(
-                    VideoTranscript.analysis_id == analysis_id
-                ).first()
-                
-                if existing_transcript:
-                    logger.info(f"Transcript already exists for analysis {analysis_id}")
-                    return {
-                        'transcript_id': existing_transcript.id,
-                        'analysis_id': analysis_id,
-                        'status': 'already_exists',
-                        'segments_count': len(existing_transcript.segments)
-                    }
-            finally:
-                db.close()
+            existing = await self._run_db(self._find_existing_transcript, analysis_id)
+            if existing:
+                logger.info(f"Transcript already exists for analysis {analysis_id}")
+                return existing
+
+            # Reuse the transcript of a byte-identical upload if there is one.
+            # Only a size match is worth an up-front hash; otherwise the hash
+            # is taken from the bytes streamed to AssemblyAI.
+            stat = os.stat(video_path)
+            content_hash = None
+            if await self._run_db(self._has_transcript_of_size, stat.st_size, language_code):
+                content_hash = await asyncio.to_thread(
+                    _hash_file, os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns
+                )
+                cloned = await self._run_db(
+                    self._clone_transcript_by_hash,
+                    analysis_id, content_hash, stat.st_size, language_code, video_path
+                )
+                if cloned:
+                    self._invalidate_analysis_subtitles(analysis_id)
+                    return cloned
             
             # Upload video to AssemblyAI
-            upload_url = await self._upload_video_to_assemblyai(video_path)
+            hasher = hashlib.blake2b(digest_size=16) if content_hash is None else None
+            upload_url = await self._upload_video_to_assemblyai(video_path, hasher)
+            if hasher is not None:
+                content_hash = hasher.hexdigest()
             
             # Request transcription
             transcript_response = await self._request_transcription(
@@ -72,8 +306,11 @@ class TranscriptService:
                 analysis_id, 
                 transcript_result,
                 video_path,
-                int(time.time() - start_time)
+                int(time.time() - start_time),
+                content_hash,
+                stat.st_size
             )
+            self._invalidate_analysis_subtitles(analysis_id)
             
             logger.info(f"Transcription completed for analysis {analysis_id} in {time.time() - start_time:.2f}s")
             
@@ -89,7 +326,7 @@ class TranscriptService:
             logger.error(f"Transcription failed for {analysis_id}: {e}")
             raise
     
-    async def _upload_video_to_assemblyai(self, video_path: str) -> str:
+    async def _upload_video_to_assemblyai(self, video_path: str, hasher=None) -> str:
         """
         Upload video file to AssemblyAI
         """
@@ -98,22 +335,23 @@ class TranscriptService:
         
         logger.info(f"Uploading video to AssemblyAI: {video_path}")
         
+        client = self._get_client()
+
         # Get upload URL
-        upload_response = requests.post(
-            f'{self.assemblyai_base_url}/upload',
-            headers={'authorization': self.assemblyai_api_key}
-        )
+        upload_response = await client.post('/upload')
         
-        if not upload_response.ok:
+        if not upload_response.is_success:
             raise Exception(f"Failed to get upload URL: {upload_response.text}")
         
         upload_url = upload_response.json()['upload_url']
         
         # Upload file
-        with open(video_path, 'rb') as f:
-            upload_file_response = requests.put(upload_url, data=f)
+        upload_file_response = await client.put(
+            upload_url,
+            content=self._iter_file_chunks(video_path, hasher)
+        )
         
-        if not upload_file_response.ok:
+        if not upload_file_response.is_success:
             raise Exception(f"Failed to upload video: {upload_file_response.text}")
         
         logger.info("Video uploaded successfully to AssemblyAI")
@@ -138,16 +376,12 @@ class TranscriptService:
             'boost_param': 'high'
         }
         
-        response = requests.post(
-            f'{self.assemblyai_base_url}/transcript',
-            headers={
-                'authorization': self.assemblyai_api_key,
-                'content-type': 'application/json'
-            },
+        response = await self._get_client().post(
+            '/transcript',
             json=transcript_request
         )
         
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"Transcription request failed: {response.text}")
         
         return response.json()
@@ -158,16 +392,16 @@ class TranscriptService:
         """
         logger.info(f"Polling transcription status: {transcript_id}")
         
-        max_polls = 300  # 5 minutes max
-        poll_count = 0
+        client = self._get_client()
+        started = time.monotonic()
+        deadline = started + POLL_TIMEOUT_SECONDS
+        delay = POLL_INITIAL_DELAY
+        next_progress_log = 30
         
-        while poll_count < max_polls:
-            response = requests.get(
-                f'{self.assemblyai_base_url}/transcript/{transcript_id}',
-                headers={'authorization': self.assemblyai_api_key}
-            )
+        while time.monotonic() < deadline:
+            response = await client.get(f'/transcript/{transcript_id}')
             
-            if not response.ok:
+            if not response.is_success:
                 raise Exception(f"Polling failed: {response.text}")
             
             result = response.json()
@@ -178,12 +412,14 @@ class TranscriptService:
             elif result['status'] == 'error':
                 raise Exception(f"AssemblyAI transcription failed: {result.get('error', 'Unknown error')}")
             
-            # Wait before next poll
-            await asyncio.sleep(1)
-            poll_count += 1
+            # Back off exponentially between polls, capped at POLL_MAX_DELAY
+            await asyncio.sleep(delay)
+            delay = min(delay * POLL_BACKOFF_FACTOR, POLL_MAX_DELAY)
             
-            if poll_count % 30 == 0:
-                logger.info(f"Still processing transcription... ({poll_count}s elapsed)")
+            elapsed = time.monotonic() - started
+            if elapsed >= next_progress_log:
+                logger.info(f"Still processing transcription... ({int(elapsed)}s elapsed)")
+                next_progress_log += 30
         
         raise Exception("Transcription timeout - please try again")
     
@@ -192,43 +428,58 @@ class TranscriptService:
         analysis_id: str,
         transcript_result: Dict[str, Any],
         video_path: str,
-        processing_time: int
+        processing_time: int,
+        content_hash: Optional[str] = None,
+        content_size: Optional[int] = None
     ) -> str:
         """
         Store transcript result in database
         """
+        return await self._run_db(
+            self._store_transcript_sync,
+            analysis_id, transcript_result, video_path, processing_time, content_hash, content_size
+        )
+
+    def _store_transcript_sync(
+        self,
+        analysis_id: str,
+        transcript_result: Dict[str, Any],
+        video_path: str,
+        processing_time: int,
+        content_hash: Optional[str],
+        content_size: Optional[int]
+    ) -> str:
+        video_filename = os.path.basename(video_path)
         db = next(get_db())
         
         try:
             # Create main transcript record
             transcript = VideoTranscript(
                 analysis_id=analysis_id,
-                video_filename=os.path.basename(video_path),
-                video_duration=transcript_result.get('audio_duration', 0) / 1000.0,  # Convert ms to seconds
+                video_filename=video_filename,
+                video_duration=transcript_result.get('audio_duration', 0) * MS_TO_SECONDS,
                 language_code=transcript_result.get('language_code', 'en-US'),
                 transcription_method='assemblyai',
                 confidence_score=transcript_result.get('confidence', 0.0),
                 full_transcript_text=transcript_result.get('text', ''),
                 processing_time_seconds=processing_time,
                 api_response_id=transcript_result.get('id'),
+                content_hash=content_hash,
+                content_size=content_size,
                 status='completed'
             )
             
             db.add(transcript)
             db.flush()  # Get the ID
             
-            # Store individual word segments
-            words = transcript_result.get('words', [])
-            for word_data in words:
-                segment = TranscriptSegment(
-                    transcript_id=transcript.id,
-                    start_time=word_data.get('start', 0) / 1000.0,  # Convert ms to seconds
-                    end_time=word_data.get('end', 0) / 1000.0,
-                    text=word_data.get('text', ''),
-                    confidence=word_data.get('confidence', 0.0),
-                    segment_type='word'
-                )
-                db.add(segment)
+            # Stream word segments into batched executemany inserts so only
+            # one batch of parameter dicts is alive at a time. Subtitle
+            # sentences are collected in the same pass and stored once so
+            # scene lookups don't regroup words.
+            words = transcript_result.get('words') or []
+            sentences = []
+            self._insert_segments(db, self._iter_word_rows(words, transcript.id, sentences))
+            self._insert_segments(db, sentences)
             
             db.commit()
             logger.info(f"Stored transcript with {len(words)} segments for analysis {analysis_id}")
@@ -242,6 +493,71 @@ class TranscriptService:
         finally:
             db.close()
 
+    def _iter_word_rows(
+        self,
+        words: List[Dict[str, Any]],
+        transcript_id: str,
+        sentences: List[Dict[str, Any]]
+    ):
+        """
+        Yield insert parameters for AssemblyAI word results while grouping
+        them into sentence rows in the same pass. A sentence ends on
+        punctuation or after SENTENCE_MAX_SECONDS; finished sentences are
+        appended to `sentences`.
+        """
+        sentence_texts = []
+        sentence_start = sentence_confidence = 0.0
+
+        for word_data in words:
+            get = word_data.get
+            start = get('start', 0) * MS_TO_SECONDS
+            end = get('end', 0) * MS_TO_SECONDS
+            text = get('text', '')
+            confidence = get('confidence', 0.0)
+            yield {
+                'transcript_id': transcript_id,
+                'start_time': start,
+                'end_time': end,
+                'text': text,
+                'confidence': confidence,
+                'segment_type': 'word'
+            }
+
+            if not sentence_texts:
+                sentence_start = start
+                sentence_confidence = 0.0
+            sentence_texts.append(text)
+            sentence_confidence += confidence or 0.0
+
+            if text[-1:] in SENTENCE_END_PUNCTUATION or end - sentence_start > SENTENCE_MAX_SECONDS:
+                sentences.append({
+                    'transcript_id': transcript_id,
+                    'start_time': sentence_start,
+                    'end_time': end,
+                    'text': ' '.join(sentence_texts).strip(),
+                    'confidence': sentence_confidence / len(sentence_texts),
+                    'segment_type': 'sentence'
+                })
+                sentence_texts = []
+
+        if sentence_texts:
+            sentences.append({
+                'transcript_id': transcript_id,
+                'start_time': sentence_start,
+                'end_time': end,
+                'text': ' '.join(sentence_texts).strip(),
+                'confidence': sentence_confidence / len(sentence_texts),
+                'segment_type': 'sentence'
+            })
+
+    def _insert_segments(self, db: Session, rows) -> None:
+        """
+        Insert segment rows from any iterable in SEGMENT_INSERT_BATCH_SIZE chunks
+        """
+        rows = iter(rows)
+        while batch := list(islice(rows, SEGMENT_INSERT_BATCH_SIZE)):
+            db.execute(insert(TranscriptSegment), batch)
+
     async def get_scene_subtitles(
         self,
         analysis_id: str,
@@ -252,6 +568,24 @@ class TranscriptService:
         """
         Get subtitle segments for specific scene timing
         """
+        if scene_id:
+            with self._subtitle_cache_lock:
+                cached_subtitles = self._subtitle_cache.get((analysis_id, scene_id))
+            if cached_subtitles:
+                return cached_subtitles
+
+        return await self._run_db(
+            self._get_scene_subtitles_sync,
+            analysis_id, scene_start, scene_end, scene_id
+        )
+
+    def _get_scene_subtitles_sync(
+        self,
+        analysis_id: str,
+        scene_start: float,
+        scene_end: float,
+        scene_id: Optional[str]
+    ) -> List[Dict[str, Any]]:
         db = next(get_db())
 
         try:
@@ -260,6 +594,7 @@ class TranscriptService:
                 cached_subtitles = self._get_cached_scene_subtitles(db, scene_id)
                 if cached_subtitles:
                     logger.info(f"Retrieved cached subtitles for scene {scene_id}")
+                    self._remember_scene_subtitles(analysis_id, scene_id, cached_subtitles)
                     return cached_subtitles
 
             # Query transcript segments
@@ -271,15 +606,18 @@ class TranscriptService:
                 logger.warning(f"No transcript found for analysis {analysis_id}")
                 return []
 
-            # Get segments within scene timing
-            segments = db.query(TranscriptSegment).filter(
+            has_sentences = db.query(TranscriptSegment.id).filter(
                 TranscriptSegment.transcript_id == transcript.id,
-                TranscriptSegment.start_time >= scene_start,
-                TranscriptSegment.end_time <= scene_end
-            ).order_by(TranscriptSegment.start_time).all()
+                TranscriptSegment.segment_type == 'sentence'
+            ).first() is not None
 
-            # Convert to subtitle format
-            subtitles = self._convert_segments_to_subtitles(segments, scene_start)
+            # Convert to subtitle format; transcripts stored before sentence
+            # rows existed still group their words here
+            if has_sentences:
+                subtitles = self._scene_sentence_subtitles(db, transcript.id, scene_start, scene_end)
+            else:
+                segments = self._scene_word_segments(db, transcript.id, scene_start, scene_end)
+                subtitles = self._convert_segments_to_subtitles(segments, scene_start)
 
             # Cache result if scene_id provided
             if scene_id and subtitles:
@@ -287,6 +625,7 @@ class TranscriptService:
                     db, scene_id, transcript.id,
                     scene_start, scene_end, subtitles
                 )
+                self._remember_scene_subtitles(analysis_id, scene_id, subtitles)
 
             logger.info(f"Retrieved {len(subtitles)} subtitles for scene timing {scene_start}-{scene_end}")
             return subtitles
@@ -294,6 +633,23 @@ class TranscriptService:
         finally:
             db.close()
 
+    def _remember_scene_subtitles(
+        self,
+        analysis_id: str,
+        scene_id: str,
+        subtitles: List[Dict[str, Any]]
+    ) -> None:
+        with self._subtitle_cache_lock:
+            self._subtitle_cache[(analysis_id, scene_id)] = subtitles
+
+    def _invalidate_analysis_subtitles(self, analysis_id: str) -> None:
+        """
+        Drop in-process cached subtitles for every scene of an analysis
+        """
+        with self._subtitle_cache_lock:
+            for key in [k for k in self._subtitle_cache if k[0] == analysis_id]:
+                self._subtitle_cache.pop(key, None)
+
     def _get_cached_scene_subtitles(self, db: Session, scene_id: str) -> Optional[List[Dict[str, Any]]]:
         """
         Get cached subtitles for a scene
@@ -343,6 +699,84 @@ class TranscriptService:
             db.rollback()
             logger.error(f"Failed to cache subtitles for scene {scene_id}: {e}")
 
+    def _scene_word_segments(
+        self,
+        db: Session,
+        transcript_id: str,
+        scene_start: float,
+        scene_end: float
+    ) -> List[TranscriptSegment]:
+        """
+        Word segments starting within the scene, in time order
+        """
+        return db.query(TranscriptSegment).filter(
+            TranscriptSegment.transcript_id == transcript_id,
+            TranscriptSegment.segment_type == 'word',
+            TranscriptSegment.start_time >= scene_start,
+            TranscriptSegment.start_time < scene_end
+        ).order_by(TranscriptSegment.start_time).all()
+
+    def _scene_sentence_subtitles(
+        self,
+        db: Session,
+        transcript_id: str,
+        scene_start: float,
+        scene_end: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Subtitles for a scene from stored sentence rows. Sentences cut by a
+        scene boundary are rebuilt from their words inside the scene, the
+        same way word-only transcripts are grouped.
+        """
+        sentences = db.query(TranscriptSegment).filter(
+            TranscriptSegment.transcript_id == transcript_id,
+            TranscriptSegment.segment_type == 'sentence',
+            TranscriptSegment.start_time < scene_end,
+            TranscriptSegment.end_time > scene_start
+        ).order_by(TranscriptSegment.start_time).all()
+
+        inside = [s for s in sentences if s.start_time >= scene_start and s.end_time <= scene_end]
+        crossing = [s for s in sentences if not (s.start_time >= scene_start and s.end_time <= scene_end)]
+
+        subtitles = self._sentences_to_subtitles(inside, scene_start)
+        if crossing:
+            words = db.query(TranscriptSegment).filter(
+                TranscriptSegment.transcript_id == transcript_id,
+                TranscriptSegment.segment_type == 'word',
+                TranscriptSegment.start_time >= scene_start,
+                TranscriptSegment.start_time < scene_end,
+                or_(*(
+                    and_(TranscriptSegment.start_time >= s.start_time,
+                         TranscriptSegment.start_time < s.end_time)
+                    for s in crossing
+                ))
+            ).order_by(TranscriptSegment.start_time).all()
+            # Group per sentence so a boundary sentence never merges with its neighbour
+            for s in crossing:
+                sentence_words = [w for w in words if s.start_time <= w.start_time < s.end_time]
+                subtitles.extend(self._convert_segments_to_subtitles(sentence_words, scene_start))
+            subtitles.sort(key=lambda subtitle: subtitle['startTime'])
+
+        return subtitles
+
+    def _sentences_to_subtitles(
+        self,
+        segments: List[TranscriptSegment],
+        scene_start: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Convert stored sentence segments to scene-relative subtitles
+        """
+        return [
+            {
+                'startTime': max(0, segment.start_time - scene_start),
+                'endTime': segment.end_time - scene_start,
+                'text': segment.text,
+                'confidence': segment.confidence or 0.8
+            }
+            for segment in segments
+        ]
+
     def _convert_segments_to_subtitles(
         self,
         segments: List[TranscriptSegment],
@@ -355,47 +789,61 @@ class TranscriptService:
             return []
 
         subtitles = []
+        append_subtitle = subtitles.append
 
         # Group words into sentences for better subtitle display
-        current_sentence = []
+        buf = []
+        buf_append = buf.append
         current_start = None
 
         for segment in segments:
+            text = segment.text
+            end_time = segment.end_time - scene_start
             if current_start is None:
                 current_start = segment.start_time - scene_start
 
-            current_sentence.append(segment.text)
+            buf_append(text)
 
             # End sentence on punctuation or after 5 seconds
-            if (segment.text.endswith(('.', '!', '?')) or
-                (segment.end_time - scene_start) - current_start > 5.0):
-
-                subtitles.append({
+            if text[-1:] in SENTENCE_END_PUNCTUATION or end_time - current_start > SENTENCE_MAX_SECONDS:
+                append_subtitle({
                     'startTime': max(0, current_start),
-                    'endTime': segment.end_time - scene_start,
-                    'text': ' '.join(current_sentence).strip(),
+                    'endTime': end_time,
+                    'text': ' '.join(buf).strip(),
                     'confidence': segment.confidence or 0.8
                 })
 
-                current_sentence = []
+                buf.clear()
                 current_start = None
 
         # Handle remaining words
-        if current_sentence and segments:
+        if buf:
             last_segment = segments[-1]
-            subtitles.append({
+            append_subtitle({
                 'startTime': max(0, current_start or 0),
                 'endTime': last_segment.end_time - scene_start,
-                'text': ' '.join(current_sentence).strip(),
+                'text': ' '.join(buf).strip(),
                 'confidence': last_segment.confidence or 0.8
             })
 
         return subtitles
 
+    def _count_word_segments(self, db: Session, transcript_id: str) -> int:
+        """
+        Count word-level segments for a transcript (excludes sentence rows)
+        """
+        return db.query(TranscriptSegment).filter(
+            TranscriptSegment.transcript_id == transcript_id,
+            TranscriptSegment.segment_type == 'word'
+        ).count()
+
     async def get_transcript_info(self, analysis_id: str) -> Optional[Dict[str, Any]]:
         """
         Get transcript information for an analysis
         """
+        return await self._run_db(self._get_transcript_info_sync, analysis_id)
+
+    def _get_transcript_info_sync(self, analysis_id: str) -> Optional[Dict[str, Any]]:
         db = next(get_db())
 
         try:
@@ -416,7 +864,7 @@ class TranscriptService:
                 'processing_time_seconds': transcript.processing_time_seconds,
                 'status': transcript.status,
                 'created_at': transcript.created_at.isoformat() if transcript.created_at else None,
-                'segments_count': len(transcript.segments)
+                'segments_count': self._count_word_segments(db, transcript.id)
             }
 
         finally:
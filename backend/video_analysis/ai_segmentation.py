@@ -1,157 +1,496 @@
 # --- START OF FILE ai_segmentation.py ---
 
+import functools
+import gc
 import json
 import os
 import sys
 import cv2
 import subprocess
-import tempfile
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 from scenedetect import VideoManager, SceneManager, FrameTimecode
 from scenedetect.detectors import ContentDetector, ThresholdDetector
+from scenedetect.scene_manager import get_scenes_from_cuts
 from detect_scenes import detect_scenes  # Import existing cut-based detection as fallback
+from detect_scenes import SCENE_FRAME_SKIP, create_scene_detectors, scene_downscale_factor, scenes_from_scene_list
+
+# PyAV lets one demux pass feed both scene detection and transcription
+try:
+    import av
+except ImportError:
+    av = None
+
+# Audio counts as silent (and transcription is skipped) when its mean level
+# is below SILENT_MEAN_VOLUME_DB or silence covers SILENT_FRACTION of it
+SILENCE_NOISE_DB = -40
+SILENCE_MIN_SECONDS = 1
+SILENT_MEAN_VOLUME_DB = -50.0
+SILENT_FRACTION = 0.95
+TRANSCRIPTION_SAMPLE_RATE = 16000
+
+@functools.lru_cache(maxsize=None)
+def _ffmpeg_has_soxr() -> bool:
+    """True if the ffmpeg on PATH was built with libsoxr."""
+    try:
+        process = subprocess.run(['ffmpeg', '-hide_banner', '-version'],
+                                 capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return '--enable-libsoxr' in process.stdout
 
-def extract_audio_for_transcription(video_path: str) -> Optional[str]:
+def extract_audio_for_transcription(video_path: str) -> Optional[np.ndarray]:
     """
-    Extract audio from video for transcription using FFmpeg.
-    Returns path to temporary audio file or None if extraction fails.
+    Decode the audio track to 16 kHz mono float32 samples, piped straight
+    from FFmpeg into memory (no temporary WAV).
+    Returns the samples or None if extraction fails.
     """
     try:
-        # Create temporary audio file
-        temp_audio = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-        temp_audio_path = temp_audio.name
-        temp_audio.close()
-
-        # Use FFmpeg to extract audio
         command = [
-            'ffmpeg', '-i', video_path,
+            'ffmpeg', '-nostdin', '-loglevel', 'error',
+            '-threads', '0',
+            '-i', video_path,
             '-vn',  # No video
+        ]
+        if _ffmpeg_has_soxr():
+            # SIMD soxr resampler: faster than the default swr for the
+            # typical 44.1/48 kHz -> 16 kHz conversion, and cleaner
+            command += ['-af', f'aresample={TRANSCRIPTION_SAMPLE_RATE}:resampler=soxr:precision=20']
+        command += [
             '-acodec', 'pcm_s16le',  # PCM 16-bit little-endian
-            '-ar', '16000',  # 16kHz sample rate (good for Whisper)
+            '-ar', str(TRANSCRIPTION_SAMPLE_RATE),  # 16kHz sample rate (good for Whisper)
             '-ac', '1',  # Mono
-            '-y',  # Overwrite output file
-            temp_audio_path
+            '-f', 's16le',
+            'pipe:1'
         ]
 
-        result = subprocess.run(command, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"Warning: Failed to extract audio: {result.stderr}", file=sys.stderr)
-            os.unlink(temp_audio_path)
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, bufsize=1024 * 1024)
+        pcm, stderr = process.communicate()
+        if process.returncode != 0:
+            print(f"Warning: Failed to extract audio: {stderr.decode(errors='replace')}", file=sys.stderr)
             return None
 
-        return temp_audio_path
+        # Whisper takes float32 in [-1, 1)
+        return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
 
     except Exception as e:
         print(f"Warning: Audio extraction failed: {str(e)}", file=sys.stderr)
         return None
 
-def transcribe_audio_whisper(audio_path: str) -> Optional[List[Dict[str, Any]]]:
+def demux_scenes_and_audio(video_path: str, content_threshold: float, fade_threshold: float,
+                           downscale_factor: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray]]:
     """
-    Transcribe audio using local Whisper model with GPU acceleration when available.
-    Returns list of segments with timestamps or None if transcription fails.
+    Detect visual scenes and decode the audio track in a single PyAV demux
+    pass, so the container is read once instead of once per consumer.
+    Video frames go through the same detectors detect_scenes uses; audio is
+    resampled to 16 kHz mono float32 for Whisper.
+
+    Returns:
+        tuple: (scenes, audio samples or None if the video has no audio track)
+    Raises on failure.
+    """
+    with av.open(video_path) as container:
+        video_stream = container.streams.video[0]
+        video_stream.thread_type = "AUTO"
+        audio_stream = container.streams.audio[0] if container.streams.audio else None
+
+        frame_rate = float(video_stream.average_rate or video_stream.guessed_rate or 0)
+        if frame_rate <= 0:
+            raise ValueError("Could not determine video frame rate")
+        detectors = create_scene_detectors(content_threshold, fade_threshold, frame_rate)
+
+        # Same working size detect_scenes uses; swscale resizes and converts
+        # to BGR in one step
+        downscale = scene_downscale_factor(video_stream.codec_context.width, downscale_factor)
+        width = max(1, round(video_stream.codec_context.width / downscale))
+        height = max(1, round(video_stream.codec_context.height / downscale))
+
+        resampler = None
+        if audio_stream is not None:
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=TRANSCRIPTION_SAMPLE_RATE)
+        pcm = bytearray()
+        cuts = []
+        frame_num = -1
+
+        streams = [video_stream] if audio_stream is None else [video_stream, audio_stream]
+        for packet in container.demux(*streams):
+            if packet.stream.type == "video":
+                for frame in packet.decode():
+                    frame_num += 1
+                    if frame_num % (SCENE_FRAME_SKIP + 1):
+                        continue
+                    image = frame.to_ndarray(width=width, height=height, format="bgr24")
+                    for detector in detectors:
+                        cuts += detector.process_frame(frame_num, image)
+            else:
+                for frame in packet.decode():
+                    for resampled in resampler.resample(frame):
+                        pcm += resampled.to_ndarray().tobytes()
+
+    if frame_num < 0:
+        raise ValueError("No video frames decoded")
+    for detector in detectors:
+        cuts += detector.post_process(frame_num)
+    if resampler is not None:
+        for resampled in resampler.resample(None):
+            pcm += resampled.to_ndarray().tobytes()
+
+    # Mirrors SceneManager.get_scene_list: no cuts means no scene list
+    base = FrameTimecode(0, frame_rate)
+    cut_list = [base + cut for cut in sorted(set(cuts))]
+    scene_list = get_scenes_from_cuts(cut_list, base, base + (frame_num + 1)) if cut_list else []
+    scenes = scenes_from_scene_list(scene_list, (frame_num + 1) / frame_rate)
+
+    audio = None
+    if audio_stream is not None:
+        # Whisper takes float32 in [-1, 1)
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    return scenes, audio
+
+# Batched pipeline is only in newer faster-whisper releases
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None
+
+# Overrides the hardware-based model size choice (e.g. "small", "large-v3")
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE")
+
+# Models stay loaded between videos; the lock keeps concurrent requests
+# from loading the same weights twice
+_whisper_load_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=2)
+def _load_faster_whisper(model_size: str, device: str, compute_type: str):
+    from faster_whisper import WhisperModel
+    return WhisperModel(model_size, device=device, compute_type=compute_type,
+                        cpu_threads=os.cpu_count() or 0)
+
+@functools.lru_cache(maxsize=2)
+def _load_whisper(model_size: str, device: str):
+    import whisper
+    model = whisper.load_model(model_size, device=device)
+    if device == "cuda":
+        _compile_whisper_encoder(model)
+    return model
+
+def _compile_whisper_encoder(model) -> None:
+    """
+    Compile the encoder with torch.compile (PyTorch 2+). Its input is always
+    30 s of mel frames, so the fused kernels and CUDA graphs are reused for
+    every window. Compilation is triggered here on silence so the cost is
+    paid once, at load; the eager encoder is kept if anything fails.
     """
+    import torch
+    if not hasattr(torch, "compile"):
+        return
+
+    eager_encoder = model.encoder
+    # transcribe feeds FP16 mels on GPU; the layers cast weights to match
+    warmup_mel = torch.zeros(1, model.dims.n_mels, 3000, device="cuda", dtype=torch.float16)
+    for mode in ("reduce-overhead", "default"):
+        try:
+            model.encoder = torch.compile(eager_encoder, mode=mode, fullgraph=False)
+            with torch.inference_mode():
+                model.encoder(warmup_mel)
+            print(f"Compiled Whisper encoder (mode={mode})", file=sys.stderr)
+            return
+        except Exception as e:
+            print(f"Warning: torch.compile of Whisper encoder failed (mode={mode}): {str(e)}", file=sys.stderr)
+    model.encoder = eager_encoder
+
+@functools.lru_cache(maxsize=None)
+def _enable_fast_cuda_math() -> None:
+    """
+    Let PyTorch use TF32 tensor cores for FP32 matmuls (Ampere and newer)
+    and autotune cuDNN convolutions for Whisper's fixed mel-input shape.
+    Runs once per process.
+    """
+    import torch
+    torch.set_float32_matmul_precision("high")
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    torch.backends.cudnn.benchmark = True
+
+def _empty_cuda_cache() -> None:
+    """Release cached CUDA blocks when PyTorch is installed."""
     try:
-        import whisper
         import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
 
-        # Check for GPU availability
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Loading Whisper model on {device.upper()}...", file=sys.stderr)
+def _get_faster_whisper(model_size: str, device: str, compute_type: str):
+    """Cached faster-whisper model for (model_size, device, compute_type)."""
+    with _whisper_load_lock:
+        return _load_faster_whisper(model_size, device, compute_type)
 
-        # Load Whisper model - choose size based on available hardware
-        # GPU: Use larger models for better accuracy since GPU is faster
-        # CPU: Use smaller models for reasonable speed
-        if device == "cuda":
-            # Try to use medium model on GPU for best quality, fallback to small if OOM
-            try:
-                model_size = "medium"
-                model = whisper.load_model(model_size, device=device)
-                print(f"Loaded {model_size} model on GPU", file=sys.stderr)
-            except torch.cuda.OutOfMemoryError:
-                print("Medium model too large for GPU, using small model...", file=sys.stderr)
-                model_size = "small"
-                model = whisper.load_model(model_size, device=device)
-        else:
-            model_size = "base"
-            model = whisper.load_model(model_size, device=device)
-
-        # Transcribe with word-level timestamps and GPU acceleration
-        print(f"Transcribing audio using {model_size} model on {device.upper()}...", file=sys.stderr)
-
-        # Additional options for GPU optimization
-        transcribe_options = {
-            "word_timestamps": True,
-            "fp16": device == "cuda",  # Use FP16 on GPU for faster processing
-        }
+def _get_whisper(model_size: str, device: str):
+    """Cached openai-whisper model for (model_size, device)."""
+    with _whisper_load_lock:
+        return _load_whisper(model_size, device)
 
-        # Time the transcription process
-        start_time = time.time()
-        result = model.transcribe(audio_path, **transcribe_options)
-        transcription_time = time.time() - start_time
-        print(f"Transcription completed in {transcription_time:.2f} seconds", file=sys.stderr)
+def audio_is_silent(audio: np.ndarray) -> bool:
+    """
+    Check decoded 16 kHz mono samples for speech-free audio, so Whisper can
+    be skipped. Mirrors FFmpeg's volumedetect (mean level) and
+    silencedetect (stretches below SILENCE_NOISE_DB lasting at least
+    SILENCE_MIN_SECONDS) on 100 ms windows.
+    """
+    window = TRANSCRIPTION_SAMPLE_RATE // 10
+    n_windows = len(audio) // window
+    if n_windows == 0:
+        return True
+
+    # Sums of squares straight from the float32 samples (BLAS dot / einsum),
+    # without materializing a squared or float64 copy of the whole track
+    mean_volume = 10 * np.log10(float(np.dot(audio, audio)) / audio.size + 1e-12)
+    if mean_volume < SILENT_MEAN_VOLUME_DB:
+        print(f"Audio mean volume {mean_volume:.1f} dB is below {SILENT_MEAN_VOLUME_DB} dB, skipping transcription", file=sys.stderr)
+        return True
+
+    frames = audio[:n_windows * window].reshape(n_windows, window)
+    window_db = 10 * np.log10(np.einsum('ij,ij->i', frames, frames) / window + 1e-12)
+    quiet = np.concatenate(([0], (window_db < SILENCE_NOISE_DB).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(quiet))
+    run_lengths = edges[1::2] - edges[::2]
+    silent_windows = run_lengths[run_lengths >= SILENCE_MIN_SECONDS * 10].sum()
+
+    if silent_windows >= SILENT_FRACTION * n_windows:
+        print(f"Audio is {silent_windows / n_windows:.0%} silence, skipping transcription", file=sys.stderr)
+        return True
+    return False
+
+def _cuda_available() -> bool:
+    """True if a CUDA device is usable by torch or, failing that, CTranslate2."""
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        pass
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except ImportError:
+        return False
+
+def _whisper_batch_size() -> int:
+    """Batch size for batched GPU inference, scaled to free GPU memory."""
+    try:
+        import torch
+        free_bytes, _total = torch.cuda.mem_get_info()
+    except Exception:
+        return 8  # No torch to ask; a middle-of-the-road default
+    free_gb = free_bytes / (1024 ** 3)
+    if free_gb >= 16:
+        return 16
+    if free_gb >= 8:
+        return 8
+    return 4
+
+def _faster_whisper_attempts() -> List[tuple]:
+    """(model_size, device, compute_type) configurations to try, in order."""
+    gpu_size = WHISPER_MODEL_SIZE or "medium"
+    cpu_size = WHISPER_MODEL_SIZE or "base"
+    if _cuda_available():
+        # GPU: larger model with INT8 weights and FP16 activations,
+        # stepping down on OOM before falling back to CPU
+        return [(gpu_size, "cuda", "int8_float16"), (gpu_size, "cuda", "int8"), (cpu_size, "cpu", "int8")]
+    # CPU: smaller model with full INT8
+    return [(cpu_size, "cpu", "int8")]
+
+def _openai_whisper_attempts(cuda: bool) -> List[tuple]:
+    """(model_size, device, fp16) configurations to try, in order."""
+    if WHISPER_MODEL_SIZE:
+        gpu_sizes, cpu_size = [WHISPER_MODEL_SIZE], WHISPER_MODEL_SIZE
+    else:
+        gpu_sizes, cpu_size = ["medium", "small", "tiny"], "base"
+    # GPU: the largest model that fits, in FP16; CPU: a small model in FP32
+    attempts = [(size, "cuda", True) for size in gpu_sizes] if cuda else []
+    attempts.append((cpu_size, "cpu", False))
+    return attempts
+
+def preload_whisper_model() -> None:
+    """
+    Load the model transcribe_audio_whisper will try first into the model
+    cache, so loading can overlap with other work. Transcription retries
+    the load (and its fallbacks) itself, so failures are only logged here.
+    """
+    try:
+        try:
+            import faster_whisper  # noqa: F401
+        except ImportError:
+            import whisper  # noqa: F401
+            model_size, device, _fp16 = _openai_whisper_attempts(_cuda_available())[0]
+            _get_whisper(model_size, device)
+            return
+        _get_faster_whisper(*_faster_whisper_attempts()[0])
+    except ImportError:
+        # Neither backend installed; transcription reports it
+        return
+    except Exception as e:
+        print(f"Warning: Whisper model preload failed: {str(e)}", file=sys.stderr)
+
+def transcribe_audio_whisper(audio: np.ndarray, word_timestamps: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """
+    Transcribe audio with faster-whisper (CTranslate2, INT8), falling back
+    to openai-whisper if faster-whisper isn't installed. Word-level timing
+    needs an extra alignment pass, so segments only carry "words" when
+    word_timestamps is set.
+    Returns list of segments with timestamps or None if transcription fails.
+    """
+    try:
+        import faster_whisper  # noqa: F401
+    except ImportError:
+        return transcribe_audio_openai_whisper(audio, word_timestamps)
 
-        # Convert to our format
-        segments = []
-        for segment in result.get("segments", []):
-            segments.append({
-                "start": segment["start"],
-                "end": segment["end"],
-                "text": segment["text"].strip(),
-                "words": segment.get("words", [])
-            })
+    try:
+        for model_size, device, compute_type in _faster_whisper_attempts():
+            try:
+                print(f"Loading faster-whisper {model_size} model on {device.upper()} ({compute_type})...", file=sys.stderr)
+                model = _get_faster_whisper(model_size, device, compute_type)
+
+                print(f"Transcribing audio using {model_size} model on {device.upper()}...", file=sys.stderr)
+                start_time = time.time()
+                # VAD skips silent stretches before they reach the decoder
+                if device == "cuda" and BatchedInferencePipeline is not None:
+                    # Encode several VAD chunks per GPU call; on CPU the
+                    # sequential path is as fast and has lower latency
+                    batch_size = _whisper_batch_size()
+                    print(f"Using batched inference (batch size {batch_size})", file=sys.stderr)
+                    segments_iter, _info = BatchedInferencePipeline(model=model).transcribe(
+                        audio, batch_size=batch_size, word_timestamps=word_timestamps, vad_filter=True, beam_size=1
+                    )
+                else:
+                    segments_iter, _info = model.transcribe(audio, word_timestamps=word_timestamps,
+                                                            vad_filter=True, beam_size=1)
+                # Segments are decoded lazily, so OOM can surface while iterating
+                segments = []
+                for segment in segments_iter:
+                    entry = {
+                        "start": segment.start,
+                        "end": segment.end,
+                        "text": segment.text.strip()
+                    }
+                    if word_timestamps:
+                        entry["words"] = [word._asdict() for word in (segment.words or [])]
+                    segments.append(entry)
+                print(f"Transcription completed in {time.time() - start_time:.2f} seconds", file=sys.stderr)
+                return segments
+            except RuntimeError as e:
+                if "out of memory" not in str(e).lower():
+                    raise
+                print(f"Warning: Out of memory with {compute_type} on {device.upper()}, retrying with less memory...", file=sys.stderr)
+                # The cached model (and the lazy iterator holding it) would
+                # keep its device memory allocated for the next attempt
+                model = segments_iter = None
+                _load_faster_whisper.cache_clear()
+                gc.collect()
+                _empty_cuda_cache()
+
+        print("Warning: Transcription ran out of memory on every device", file=sys.stderr)
+        return None
 
-        return segments
+    except Exception as e:
+        print(f"Warning: Transcription failed: {str(e)}", file=sys.stderr)
+        return None
 
+def transcribe_audio_openai_whisper(audio: np.ndarray, word_timestamps: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """
+    Transcribe audio using local openai-whisper model with GPU acceleration when available.
+    On out-of-memory, steps down through smaller models and then the CPU.
+    Returns list of segments with timestamps or None if transcription fails.
+    """
+    try:
+        import whisper  # noqa: F401
+        import torch
     except ImportError:
-        print("Warning: Whisper not available. Install with: pip install openai-whisper", file=sys.stderr)
+        print("Warning: Whisper not available. Install with: pip install faster-whisper", file=sys.stderr)
         return None
-    except torch.cuda.OutOfMemoryError:
-        print("Warning: GPU out of memory, falling back to CPU...", file=sys.stderr)
-        try:
-            # Retry with CPU and smaller model
-            model = whisper.load_model("base", device="cpu")
-            result = model.transcribe(audio_path, word_timestamps=True, fp16=False)
-            segments = []
-            for segment in result.get("segments", []):
-                segments.append({
-                    "start": segment["start"],
-                    "end": segment["end"],
-                    "text": segment["text"].strip(),
-                    "words": segment.get("words", [])
-                })
-            return segments
-        except Exception as fallback_e:
-            print(f"Warning: CPU fallback also failed: {str(fallback_e)}", file=sys.stderr)
-            return None
+
+    try:
+        for model_size, device, fp16 in _openai_whisper_attempts(torch.cuda.is_available()):
+            try:
+                print(f"Loading Whisper {model_size} model on {device.upper()}...", file=sys.stderr)
+                model = _get_whisper(model_size, device)
+
+                if device == "cuda":
+                    _enable_fast_cuda_math()
+                # On GPU, hand Whisper a device tensor so the STFT and mel filterbank
+                # (cached per device by whisper) run there instead of on the CPU
+                audio_input = torch.from_numpy(audio).to(device) if device == "cuda" else audio
+
+                print(f"Transcribing audio using {model_size} model on {device.upper()}...", file=sys.stderr)
+                start_time = time.time()
+                # inference_mode skips autograd bookkeeping entirely
+                with torch.inference_mode():
+                    result = model.transcribe(audio_input, word_timestamps=word_timestamps, fp16=fp16)
+                print(f"Transcription completed in {time.time() - start_time:.2f} seconds "
+                      f"({model_size} model on {device.upper()})", file=sys.stderr)
+                return _whisper_result_segments(result, word_timestamps)
+            except torch.cuda.OutOfMemoryError:
+                print(f"Warning: Out of memory with {model_size} model on {device.upper()}, retrying with less memory...", file=sys.stderr)
+                # Cached models would keep their GPU memory pinned
+                model = audio_input = None
+                _load_whisper.cache_clear()
+                torch.cuda.empty_cache()
+
+        print("Warning: Transcription ran out of memory on every device", file=sys.stderr)
+        return None
+
     except Exception as e:
         print(f"Warning: Transcription failed: {str(e)}", file=sys.stderr)
         return None
 
+def _whisper_result_segments(result: Dict[str, Any], word_timestamps: bool) -> List[Dict[str, Any]]:
+    """Convert an openai-whisper result to our segment format."""
+    segments = []
+    for segment in result.get("segments", []):
+        entry = {
+            "start": segment["start"],
+            "end": segment["end"],
+            "text": segment["text"].strip()
+        }
+        if word_timestamps:
+            entry["words"] = segment.get("words", [])
+        segments.append(entry)
+    return segments
+
 def detect_topic_boundaries(segments: List[Dict[str, Any]], min_segment_length: float = 5.0) -> List[float]:
     """
     Simple topic boundary detection based on sentence endings and pauses.
     Returns list of timestamps where topic boundaries are detected.
     """
     boundaries = [0.0]  # Always start with beginning
+    if not segments:
+        return boundaries
 
-    for i, segment in enumerate(segments):
-        text = segment["text"].strip()
-        duration = segment["end"] - segment["start"]
+    starts = np.fromiter((seg["start"] for seg in segments), dtype=float, count=len(segments))
+    ends = np.fromiter((seg["end"] for seg in segments), dtype=float, count=len(segments))
 
-        # Look for natural boundaries
-        is_sentence_end = text.endswith(('.', '!', '?'))
-        is_long_pause = i < len(segments) - 1 and segments[i + 1]["start"] - segment["end"] > 1.0
-        is_question = '?' in text
+    # Natural boundaries: sentence endings ('?' anywhere marks a question),
+    # or a pause of more than a second before the next segment
+    texts = [seg["text"].strip() for seg in segments]
+    is_sentence_end = np.fromiter((text.endswith(('.', '!')) or '?' in text for text in texts),
+                                  dtype=bool, count=len(segments))
+    gaps = np.append(starts[1:] - ends[:-1], 0.0)
+    candidates = ends[is_sentence_end | (gaps > 1.0)]
 
-        # Add boundary if we have indicators and minimum length is met
-        if (is_sentence_end or is_long_pause or is_question):
-            if len(boundaries) == 0 or segment["end"] - boundaries[-1] >= min_segment_length:
-                boundaries.append(segment["end"])
+    # Add boundary if the minimum length since the last one is met
+    for end in candidates.tolist():
+        if end - boundaries[-1] >= min_segment_length:
+            boundaries.append(end)
 
     return boundaries
 
-def detect_scenes_ai(video_path: str, content_threshold: float = 27.0, fade_threshold: float = 5.0) -> List[Dict[str, Any]]:
+def detect_scenes_ai(video_path: str, content_threshold: float = 27.0, fade_threshold: float = 5.0,
+                     downscale_factor: Optional[int] = None,
+                     word_timestamps: bool = False) -> List[Dict[str, Any]]:
     """
     AI-based scene detection combining visual cuts with speech analysis.
     Uses GPU acceleration when available for faster processing.
@@ -160,45 +499,66 @@ def detect_scenes_ai(video_path: str, content_threshold: float = 27.0, fade_thre
         video_path (str): Path to the video file
         content_threshold (float): Threshold for ContentDetector (cuts)
         fade_threshold (float): Threshold for ThresholdDetector (fades)
+        downscale_factor (int): Fixed frame downscale for cut detection (None = automatic)
+        word_timestamps (bool): Have Whisper align individual words (slower, unused by segmentation)
 
     Returns:
         list: List of dictionaries containing scene start, end, and additional AI metadata
     """
-    import torch
-
     # Check GPU availability for performance info
-    device_info = "GPU (CUDA)" if torch.cuda.is_available() else "CPU"
+    device_info = "GPU (CUDA)" if _cuda_available() else "CPU"
     print(f"Starting AI-based segmentation using {device_info}...", file=sys.stderr)
 
-    # Step 1: Get traditional cut-based boundaries as candidates
-    print("Getting visual cut boundaries...", file=sys.stderr)
-    visual_scenes = detect_scenes(video_path, content_threshold, fade_threshold)
+    # Visual cut detection, audio extraction and Whisper model loading are
+    # independent and mostly outside the GIL (decoders, subprocess, disk/GPU),
+    # so run them side by side
+    pool = ThreadPoolExecutor(max_workers=3)
+    try:
+        pool.submit(preload_whisper_model)
+
+        visual_scenes = None
+        if av is not None:
+            # Steps 1 and 2 in one pass over the container
+            print("Getting visual cut boundaries and audio in a single pass...", file=sys.stderr)
+            try:
+                visual_scenes, audio = demux_scenes_and_audio(video_path, content_threshold, fade_threshold,
+                                                              downscale_factor)
+            except Exception as e:
+                print(f"Warning: Single-pass demux failed ({str(e)}), decoding separately", file=sys.stderr)
+
+        if visual_scenes is None:
+            # Step 1: Get traditional cut-based boundaries as candidates
+            print("Getting visual cut boundaries...", file=sys.stderr)
+            visual_future = pool.submit(detect_scenes, video_path, content_threshold, fade_threshold,
+                                        downscale_factor)
+
+            # Step 2: Extract audio for transcription
+            print("Extracting audio for transcription...", file=sys.stderr)
+            audio_future = pool.submit(extract_audio_for_transcription, video_path)
+
+            visual_scenes = visual_future.result()
+            audio = audio_future.result()
+    finally:
+        # Don't wait for the preload: silent audio never transcribes, and
+        # transcription itself blocks on the model cache lock until it's loaded
+        pool.shutdown(wait=False, cancel_futures=True)
+
     if not visual_scenes:
         print("Warning: No visual scenes detected", file=sys.stderr)
         return []
 
-    # Step 2: Extract and transcribe audio
-    print("Extracting audio for transcription...", file=sys.stderr)
-    audio_path = extract_audio_for_transcription(video_path)
-
     transcript_segments = None
     topic_boundaries = []
 
-    if audio_path:
-        try:
-            # Transcribe audio
-            transcript_segments = transcribe_audio_whisper(audio_path)
-
-            if transcript_segments:
-                print(f"Transcribed {len(transcript_segments)} speech segments", file=sys.stderr)
-                # Detect topic boundaries
-                topic_boundaries = detect_topic_boundaries(transcript_segments)
-                print(f"Detected {len(topic_boundaries)} topic boundaries", file=sys.stderr)
+    # Transcribe audio, unless there's nothing to hear
+    if audio is not None and not audio_is_silent(audio):
+        transcript_segments = transcribe_audio_whisper(audio, word_timestamps)
 
-        finally:
-            # Clean up temporary audio file
-            if os.path.exists(audio_path):
-                os.unlink(audio_path)
+        if transcript_segments:
+            print(f"Transcribed {len(transcript_segments)} speech segments", file=sys.stderr)
+            # Detect topic boundaries
+            topic_boundaries = detect_topic_boundaries(transcript_segments)
+            print(f"Detected {len(topic_boundaries)} topic boundaries", file=sys.stderr)
 
     # Step 3: Combine visual and speech boundaries
     print("Combining visual and speech boundaries...", file=sys.stderr)
@@ -218,6 +578,20 @@ def detect_scenes_ai(video_path: str, content_threshold: float = 27.0, fade_thre
     # Sort boundaries
     sorted_boundaries = sorted(all_boundaries)
 
+    # Transcript timing as arrays, so each scene finds its overlapping
+    # segments by binary search instead of scanning the whole transcript
+    if transcript_segments:
+        transcript_segments = sorted(transcript_segments, key=lambda seg: seg["start"])
+        seg_starts = np.fromiter((seg["start"] for seg in transcript_segments), dtype=float,
+                                 count=len(transcript_segments))
+        seg_ends = np.fromiter((seg["end"] for seg in transcript_segments), dtype=float,
+                               count=len(transcript_segments))
+        # Running max keeps the search valid if a segment ends after its successor
+        seg_ends_max = np.maximum.accumulate(seg_ends)
+    # Keyed at the same 2-decimal precision scenes are reported with, so a
+    # boundary still matches after float noise or a JSON round trip
+    topic_boundary_set = {round(boundary, 2) for boundary in topic_boundaries}
+
     # Create final scenes
     ai_scenes = []
     for i in range(len(sorted_boundaries) - 1):
@@ -233,11 +607,14 @@ def detect_scenes_ai(video_path: str, content_threshold: float = 27.0, fade_thre
         segment_topics = []
 
         if transcript_segments:
-            segment_texts = []
-            for seg in transcript_segments:
-                # Check if segment overlaps with our scene
-                if seg["start"] < end_time and seg["end"] > start_time:
-                    segment_texts.append(seg["text"].strip())
+            # Candidates: ended after the scene starts and start before it ends
+            lo = int(np.searchsorted(seg_ends_max, start_time, side="right"))
+            hi = int(np.searchsorted(seg_starts, end_time, side="left"))
+            segment_texts = [
+                transcript_segments[j]["text"].strip()
+                for j in range(lo, hi)
+                if seg_ends[j] > start_time
+            ]
 
             segment_transcript = " ".join(segment_texts).strip()
 
@@ -251,7 +628,7 @@ def detect_scenes_ai(video_path: str, content_threshold: float = 27.0, fade_thre
         transition_type = "cut"  # Default
 
         # Check if this boundary came from topic detection
-        if start_time in topic_boundaries:
+        if round(start_time, 2) in topic_boundary_set:
             transition_type = "topic-change"
 
         scene = {
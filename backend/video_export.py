@@ -4,12 +4,24 @@ Handles exporting timeline data to MP4 videos by stitching mezzanine segments
 """
 
 import os
+import errno
 import subprocess
 import tempfile
 import json
-import uuid
-from typing import Dict, Any, List, Optional
+import functools
+import itertools
+import logging
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
+from operator import itemgetter
+
+from video_segmentation import run_ffmpeg, tail_stderr
+
+
+logger = logging.getLogger(__name__)
 
 
 class VideoExportError(Exception):
@@ -17,31 +29,106 @@ class VideoExportError(Exception):
     pass
 
 
+# Names concat list files; each export already gets its own temp directory
+_concat_file_counter = itertools.count()
+
+# How often the concat FIFO writer retries opening until ffmpeg reads it
+FIFO_OPEN_POLL_SECONDS = 0.01
+
+# Bytes read from ffmpeg's stdout per streamed chunk
+STREAM_CHUNK_SIZE = 1 << 20
+
+
+def concat_file_line(segment_path: str) -> str:
+    """
+    Format a path as an FFmpeg concat demuxer 'file' directive.
+    Single quotes are escaped shell-style ('\\'') so paths containing
+    apostrophes don't break the list.
+    """
+    escaped = segment_path.replace("'", "'\\''")
+    return f"file '{escaped}'\n"
+
+
 def create_ffmpeg_concat_file(segments: List[Dict[str, Any]], temp_dir: str) -> str:
     """
     Create an FFmpeg concat file for stitching video segments.
     
     Args:
-        segments: List of segment data with file paths and timing
+        segments: List of segment data with pre-formatted concat lines
         temp_dir: Temporary directory for concat file
         
     Returns:
         Path to the concat file
     """
-    concat_file_path = os.path.join(temp_dir, f"concat_{uuid.uuid4().hex}.txt")
+    concat_file_path = os.path.join(temp_dir, f"concat_{next(_concat_file_counter)}.txt")
     
+    # Segment paths were validated by extract_timeline_segments
     with open(concat_file_path, 'w') as f:
-        for segment in segments:
-            # Write each segment file path
-            segment_path = segment['file_path']
-            if os.path.exists(segment_path):
-                f.write(f"file '{segment_path}'\n")
-            else:
-                raise VideoExportError(f"Segment file not found: {segment_path}")
+        f.writelines(segment['concat_line'] for segment in segments)
     
     return concat_file_path
 
 
+class _ConcatFifoWriter(threading.Thread):
+    """Feeds concat lines into a FIFO once ffmpeg opens it for reading."""
+
+    def __init__(self, fifo_path: str, lines: List[str]):
+        super().__init__(daemon=True)
+        self.fifo_path = fifo_path
+        self.lines = lines
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        # A blocking open() would wait forever if ffmpeg never opens the
+        # list, so poll a non-blocking open until a reader appears or
+        # close_concat_list gives up on it
+        while True:
+            try:
+                fd = os.open(self.fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+                break
+            except OSError as e:
+                if e.errno != errno.ENXIO or self.stopped.wait(FIFO_OPEN_POLL_SECONDS):
+                    return
+        try:
+            os.set_blocking(fd, True)
+            with os.fdopen(fd, 'w') as f:
+                f.writelines(self.lines)
+        except OSError:
+            pass  # Reader went away (ffmpeg failed mid-list)
+
+
+def open_concat_list(segments: List[Dict[str, Any]], temp_dir: str) -> Tuple[str, Optional[_ConcatFifoWriter]]:
+    """
+    Provide the concat list to FFmpeg. On POSIX the lines are handed over
+    through a named pipe by a writer thread, so the list never touches
+    disk; elsewhere a regular concat file is written.
+    
+    Returns:
+        (path to pass to -i, writer thread or None); pass both to
+        close_concat_list once ffmpeg has exited
+    """
+    if not hasattr(os, 'mkfifo'):
+        return create_ffmpeg_concat_file(segments, temp_dir), None
+    
+    fifo_path = os.path.join(temp_dir, f"concat_{next(_concat_file_counter)}.fifo")
+    os.mkfifo(fifo_path)
+    writer = _ConcatFifoWriter(fifo_path, [segment['concat_line'] for segment in segments])
+    writer.start()
+    return fifo_path, writer
+
+
+def close_concat_list(concat_path: str, writer: Optional[_ConcatFifoWriter]) -> None:
+    """
+    Stop the FIFO writer thread from open_concat_list and wait for it.
+    Call once ffmpeg has exited: with no reader left, a writer still
+    waiting to open stops polling and one mid-write gets EPIPE.
+    """
+    if writer is None:
+        return
+    writer.stopped.set()
+    writer.join()
+
+
 def extract_timeline_segments(timeline_data: Dict[str, Any], analysis_id: str, segments_base_dir: str) -> List[Dict[str, Any]]:
     """
     Extract mezzanine segment information from timeline data.
@@ -77,17 +164,18 @@ def extract_timeline_segments(timeline_data: Dict[str, Any], analysis_id: str, s
         print(f"❌ No clips found. Available keys in timeline data: {available_keys}")
         raise VideoExportError("No clips found in timeline data")
 
-    # Filter for mezzanine video segments
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    # Keep mezzanine video clips with a source, keyed by timeline position (display.from)
     mezzanine_clips = []
     for clip in clips:
-        clip_type = clip.get('type', '')
-        is_mezzanine = clip.get('metadata', {}).get('isMezzanineSegment', False)
-        has_src = bool(clip.get('details', {}).get('src', ''))
-
-        print(f"🔍 Checking clip {clip.get('id', 'unknown')}: type={clip_type}, isMezzanine={is_mezzanine}, hasSrc={has_src}")
-
-        if clip_type == 'video' and is_mezzanine and has_src:
-            mezzanine_clips.append(clip)
+        src_url = (clip.get('details') or {}).get('src')
+        is_mezzanine = (clip.get('metadata') or {}).get('isMezzanineSegment', False)
+        if debug:
+            logger.debug(f"Checking clip {clip.get('id', 'unknown')}: type={clip.get('type', '')}, isMezzanine={is_mezzanine}, hasSrc={bool(src_url)}")
+        if clip.get('type') == 'video' and is_mezzanine and src_url:
+            display = clip.get('display') or {}
+            mezzanine_clips.append((display.get('from', 0), display.get('to', 0), src_url, clip))
 
     if not mezzanine_clips:
         print(f"❌ No mezzanine video segments found. Total clips checked: {len(clips)}")
@@ -95,33 +183,38 @@ def extract_timeline_segments(timeline_data: Dict[str, Any], analysis_id: str, s
 
     print(f"✅ Found {len(mezzanine_clips)} mezzanine clips")
 
-    # Sort clips by timeline position (display.from)
-    mezzanine_clips.sort(key=lambda x: x.get('display', {}).get('from', 0))
+    mezzanine_clips.sort(key=itemgetter(0))
 
     # Build segment list
     mezzanine_dir = os.path.join(segments_base_dir, analysis_id, "segments", "mezzanine")
 
-    for clip in mezzanine_clips:
-        src_url = clip.get('details', {}).get('src', '')
-        if not src_url:
-            continue
+    # One directory read instead of a stat per clip
+    try:
+        with os.scandir(mezzanine_dir) as entries:
+            available = {entry.name for entry in entries}
+    except OSError:
+        available = set()
+
+    # Plain concatenation in the per-clip loop instead of os.path.join
+    mezzanine_prefix = mezzanine_dir.rstrip(os.sep) + os.sep
 
+    for timeline_start, timeline_end, src_url, clip in mezzanine_clips:
         # Extract filename from URL
         filename = src_url.split('/')[-1].split('?')[0]  # Remove query params
-        segment_path = os.path.join(mezzanine_dir, filename)
+        segment_path = mezzanine_prefix + filename
 
-        print(f"🎞️ Processing segment: {filename}")
-        print(f"   Timeline: {clip.get('display', {}).get('from', 0)} - {clip.get('display', {}).get('to', 0)}")
-        print(f"   Path: {segment_path}")
+        if debug:
+            logger.debug(f"Processing segment {filename}: timeline {timeline_start} - {timeline_end}, path {segment_path}")
 
-        if not os.path.exists(segment_path):
+        if filename not in available:
             raise VideoExportError(f"Mezzanine segment file not found: {segment_path}")
 
         segments.append({
             'file_path': segment_path,
-            'timeline_start': clip.get('display', {}).get('from', 0),
-            'timeline_end': clip.get('display', {}).get('to', 0),
-            'scene_id': clip.get('metadata', {}).get('sceneId'),
+            'concat_line': concat_file_line(segment_path),
+            'timeline_start': timeline_start,
+            'timeline_end': timeline_end,
+            'scene_id': (clip.get('metadata') or {}).get('sceneId'),
             'clip_id': clip.get('id')
         })
 
@@ -129,6 +222,261 @@ def extract_timeline_segments(timeline_data: Dict[str, Any], analysis_id: str, s
     return segments
 
 
+def parse_frame_rate(rate: str) -> float:
+    """Parse an ffprobe rational frame rate such as '30000/1001'."""
+    num, _, den = rate.partition('/')
+    try:
+        return float(num) / float(den) if den else float(num)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def normalize_segment(segment_path: str, output_path: str, width: int, height: int, fps: float,
+                      threads: int = 0) -> None:
+    """
+    Re-encode a single segment to the target composition so it can be
+    stream-copied alongside segments that already match.
+    threads=0 lets the encoder use all cores.
+    """
+    ffmpeg_cmd = [
+        "ffmpeg",
+        "-y",
+        "-i", segment_path,
+        "-map", "0:v:0",
+        "-map", "0:a:0?",
+        "-vf", f"scale={width}:{height}",
+        "-r", str(fps),
+        "-c:v", "libx264",
+        "-preset", "veryfast",  # Same encoder settings as mezzanine segments
+        "-crf", "23",
+        "-threads", str(threads),
+        "-x264-params", "sliced-threads=1",  # Scales across cores even on short clips
+        "-pix_fmt", "yuv420p",
+        "-c:a", "aac",
+        "-b:a", "128k",
+        output_path
+    ]
+    returncode, stderr_tail = run_ffmpeg(ffmpeg_cmd, timeout=None)
+    if returncode != 0:
+        raise VideoExportError(f"FFmpeg failed normalizing {segment_path}: {stderr_tail}")
+
+
+def stream_format_key(codec_params: Tuple) -> Tuple:
+    """
+    The parts of probe_codec_params output that must agree for segments to
+    share one set of codec headers when stream-copied: codec, profile and
+    pixel format of video, codec and layout of audio.
+    """
+    fields = ('codec_type', 'codec_name', 'profile', 'pix_fmt', 'sample_rate', 'channels')
+    return tuple(
+        tuple(value for key, value in stream if key in fields)
+        for stream in codec_params
+    )
+
+
+def video_geometry(codec_params: Tuple) -> Tuple[Optional[int], Optional[int], float]:
+    """Width, height and fps of the first video stream in probe_codec_params output."""
+    for stream in codec_params:
+        entries = dict(stream)
+        if entries.get('codec_type') == 'video':
+            return entries.get('width'), entries.get('height'), parse_frame_rate(entries.get('avg_frame_rate', '0/0'))
+    return None, None, 0.0
+
+
+def conform_segments_to_composition(
+    segments: List[Dict[str, Any]],
+    composition_settings: Dict[str, Any],
+    temp_dir: str
+) -> List[Dict[str, Any]]:
+    """
+    Make every segment match the composition's width, height and fps, and
+    share one codec, profile and pixel format, so the timeline can always be
+    concatenated with stream copy. Segments that already conform are used
+    as-is; the rest are transcoded (in parallel) into temp_dir.
+    
+    Args:
+        segments: Segment list from extract_timeline_segments
+        composition_settings: Video composition settings (width, height, fps)
+        temp_dir: Scratch directory for transcoded segments
+        
+    Returns:
+        Segment list with non-conforming entries pointing at normalized files
+    """
+    width = composition_settings.get('width', 1920)
+    height = composition_settings.get('height', 1080)
+    fps = composition_settings.get('fps', 30)
+    
+    # Each normalize encode already spreads across cores, so only a few run
+    # at once, each with its share of threads
+    cpu_count = os.cpu_count() or 2
+    encode_workers = max(1, cpu_count // 4)
+    encode_threads = max(2, cpu_count // encode_workers)
+    
+    with ThreadPoolExecutor(max_workers=min(8, cpu_count)) as probe_pool:
+        params = list(probe_pool.map(probe_codec_params, (seg['file_path'] for seg in segments)))
+    keys = [stream_format_key(p) for p in params]
+    
+    def off_geometry(i):
+        seg_width, seg_height, seg_fps = video_geometry(params[i])
+        return seg_width != width or seg_height != height or abs(seg_fps - fps) > 0.01
+    
+    conformed = list(segments)
+    temp_prefix = temp_dir.rstrip(os.sep) + os.sep
+    
+    def normalize_all(indices):
+        with ThreadPoolExecutor(max_workers=encode_workers) as pool:
+            futures = []
+            for i in indices:
+                output_path = f"{temp_prefix}normalized_{i}.mp4"
+                futures.append(pool.submit(normalize_segment, segments[i]['file_path'], output_path,
+                                           width, height, fps, encode_threads))
+                conformed[i] = {**segments[i], 'file_path': output_path, 'concat_line': concat_file_line(output_path)}
+            for future in futures:
+                future.result()
+    
+    mismatched = [i for i in range(len(segments)) if off_geometry(i)]
+    if mismatched:
+        print(f"🔄 Normalizing {len(mismatched)} of {len(segments)} segments to {width}x{height}@{fps}")
+        normalize_all(mismatched)
+        # Everything else must now match what the normalizer produces
+        target_key = stream_format_key(probe_codec_params(conformed[mismatched[0]]['file_path']))
+    else:
+        # Keep the most common format and re-encode the others to match it
+        target_key = max(set(keys), key=keys.count)
+    
+    normalized = set(mismatched)
+    off_format = [i for i in range(len(segments)) if i not in normalized and keys[i] != target_key]
+    if off_format:
+        print(f"🔄 Normalizing {len(off_format)} of {len(segments)} segments with differing codec parameters")
+        normalize_all(off_format)
+        normalized.update(off_format)
+        produced_key = stream_format_key(probe_codec_params(conformed[off_format[0]]['file_path']))
+        if produced_key != target_key:
+            # The kept format isn't what the normalizer writes, so the rest
+            # has to be re-encoded too
+            rest = [i for i in range(len(segments)) if i not in normalized]
+            print(f"🔄 Normalizing the remaining {len(rest)} segments to a common format")
+            normalize_all(rest)
+    elif not mismatched:
+        print(f"✅ All {len(segments)} segments match {width}x{height}@{fps}, stream copying")
+    
+    return conformed
+
+
+def concat_with_demuxer(segments: List[Dict[str, Any]], temp_dir: str, output_path: str) -> None:
+    """
+    Stream-copy segments into output_path with FFmpeg's concat demuxer.
+    
+    Raises:
+        VideoExportError: If FFmpeg fails
+    """
+    # Hand the concat list to FFmpeg
+    concat_file_path, concat_writer = open_concat_list(segments, temp_dir)
+    
+    # Prepare FFmpeg command for concatenation
+    ffmpeg_cmd = [
+        "ffmpeg",
+        "-y",  # Overwrite output file
+        "-f", "concat",
+        "-safe", "0",
+        "-thread_queue_size", "1024",  # Keep the muxer fed across many small inputs
+        "-fflags", "+genpts+igndts",   # Rebuild timestamps across segment joins
+        "-i", concat_file_path,
+        "-c", "copy",  # Copy streams without re-encoding for speed
+        "-avoid_negative_ts", "make_zero",
+        "-movflags", "+faststart",  # Optimize for web playback
+    ]
+    
+    ffmpeg_cmd.append(output_path)
+    
+    # Execute FFmpeg command
+    try:
+        returncode, stderr_tail = run_ffmpeg(ffmpeg_cmd, timeout=None)
+    finally:
+        close_concat_list(concat_file_path, concat_writer)
+    
+    if returncode != 0:
+        error_msg = f"FFmpeg failed: {stderr_tail}"
+        raise VideoExportError(error_msg)
+
+
+@functools.lru_cache(maxsize=1)
+def find_mkvmerge() -> Optional[str]:
+    """Path to mkvmerge if it is installed, looked up once."""
+    return shutil.which("mkvmerge")
+
+
+def probe_codec_params(segment_path: str) -> Tuple:
+    """
+    Codec parameters of every stream in a segment, as a hashable tuple;
+    segments with equal tuples can be appended without re-encoding.
+    """
+    process = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-show_entries",
+            "stream=codec_type,codec_name,profile,level,width,height,pix_fmt,avg_frame_rate,time_base,sample_rate,channels",
+            "-of", "json",
+            segment_path
+        ],
+        capture_output=True,
+        text=True,
+        check=False
+    )
+    if process.returncode != 0:
+        raise VideoExportError(f"ffprobe failed for {segment_path}: {process.stderr}")
+    
+    streams = json.loads(process.stdout).get('streams') or []
+    return tuple(tuple(sorted(stream.items())) for stream in streams)
+
+
+def concat_with_mkvmerge(segments: List[Dict[str, Any]], temp_dir: str, output_path: str) -> bool:
+    """
+    Append segments with mkvmerge and remux the result to MP4. Only used
+    when mkvmerge is installed and every segment has identical codec
+    parameters.
+    
+    Returns:
+        True if output_path was written, False if the caller should fall
+        back to the concat demuxer
+    """
+    mkvmerge = find_mkvmerge()
+    if not mkvmerge or len(segments) < 2:
+        return False
+    
+    paths = [segment['file_path'] for segment in segments]
+    try:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            params = set(pool.map(probe_codec_params, paths))
+    except VideoExportError as e:
+        print(f"⚠️ Could not probe segments for mkvmerge ({e}), using concat demuxer")
+        return False
+    if len(params) != 1:
+        return False
+    
+    merged_path = os.path.join(temp_dir, "merged.mkv")
+    mkvmerge_cmd = [mkvmerge, "-q", "-o", merged_path, paths[0]]
+    for path in paths[1:]:
+        mkvmerge_cmd += ["+", path]
+    
+    process = subprocess.run(mkvmerge_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+    # Exit code 1 means warnings only; the output is still complete
+    if process.returncode not in (0, 1):
+        print(f"⚠️ mkvmerge failed ({process.stderr.strip()}), using concat demuxer")
+        return False
+    
+    returncode, stderr_tail = run_ffmpeg(
+        ["ffmpeg", "-y", "-i", merged_path, "-map", "0", "-c", "copy", "-movflags", "+faststart", output_path],
+        timeout=None
+    )
+    if returncode != 0:
+        print(f"⚠️ Remux of mkvmerge output failed ({stderr_tail.strip()}), using concat demuxer")
+        return False
+    
+    print(f"✅ Joined {len(segments)} segments with mkvmerge")
+    return True
+
+
 def export_timeline_to_mp4(
     timeline_data: Dict[str, Any],
     analysis_id: str,
@@ -160,56 +508,15 @@ def export_timeline_to_mp4(
         
         # Create temporary directory for processing
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Create FFmpeg concat file
-            concat_file_path = create_ffmpeg_concat_file(segments, temp_dir)
-            
-            # Prepare FFmpeg command for concatenation
-            ffmpeg_cmd = [
-                "ffmpeg",
-                "-y",  # Overwrite output file
-                "-f", "concat",
-                "-safe", "0",
-                "-i", concat_file_path,
-                "-c", "copy",  # Copy streams without re-encoding for speed
-                "-movflags", "+faststart",  # Optimize for web playback
-            ]
-            
-            # Add composition settings if provided
+            # Re-encode only the segments that don't already match the
+            # requested composition, then concatenate everything by copy
             if composition_settings:
-                width = composition_settings.get('width', 1920)
-                height = composition_settings.get('height', 1080)
-                fps = composition_settings.get('fps', 30)
-                
-                # If we need to resize or change fps, we need to re-encode
-                ffmpeg_cmd = [
-                    "ffmpeg",
-                    "-y",
-                    "-f", "concat",
-                    "-safe", "0", 
-                    "-i", concat_file_path,
-                    "-vf", f"scale={width}:{height}",
-                    "-r", str(fps),
-                    "-c:v", "libx264",
-                    "-preset", "medium",
-                    "-crf", "23",
-                    "-c:a", "aac",
-                    "-b:a", "128k",
-                    "-movflags", "+faststart",
-                ]
+                segments = conform_segments_to_composition(segments, composition_settings, temp_dir)
             
-            ffmpeg_cmd.append(output_path)
-            
-            # Execute FFmpeg command
-            process = subprocess.run(
-                ffmpeg_cmd,
-                capture_output=True,
-                text=True,
-                check=False
-            )
-            
-            if process.returncode != 0:
-                error_msg = f"FFmpeg failed: {process.stderr}"
-                raise VideoExportError(error_msg)
+            # mkvmerge joins uniform segments fastest; the concat demuxer
+            # handles everything else
+            if not concat_with_mkvmerge(segments, temp_dir, output_path):
+                concat_with_demuxer(segments, temp_dir, output_path)
             
             # Verify output file was created
             if not os.path.exists(output_path):
@@ -237,6 +544,92 @@ def export_timeline_to_mp4(
         raise VideoExportError(f"Unexpected error during export: {str(e)}")
 
 
+def stream_timeline_to_mp4(
+    timeline_data: Dict[str, Any],
+    analysis_id: str,
+    segments_base_dir: str,
+    composition_settings: Optional[Dict[str, Any]] = None
+) -> Iterator[bytes]:
+    """
+    Stitch mezzanine segments like export_timeline_to_mp4, but stream the
+    result as fragmented MP4 instead of writing an output file.
+    
+    Segments are validated before this returns, so missing segments raise
+    here rather than midway through a response.
+    
+    Args:
+        timeline_data: Timeline data from frontend
+        analysis_id: Analysis ID for locating segments
+        segments_base_dir: Base directory containing segments
+        composition_settings: Video composition settings (width, height, fps)
+        
+    Returns:
+        Iterator of MP4 byte chunks
+        
+    Raises:
+        VideoExportError: If the timeline has no valid segments
+    """
+    segments = extract_timeline_segments(timeline_data, analysis_id, segments_base_dir)
+    if not segments:
+        raise VideoExportError("No valid segments found for export")
+    return _stream_concat(segments, composition_settings)
+
+
+def _stream_concat(
+    segments: List[Dict[str, Any]],
+    composition_settings: Optional[Dict[str, Any]]
+) -> Iterator[bytes]:
+    """Run the stream-copy concat with ffmpeg writing to stdout and yield its output."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if composition_settings:
+            segments = conform_segments_to_composition(segments, composition_settings, temp_dir)
+        
+        concat_path, concat_writer = open_concat_list(segments, temp_dir)
+        try:
+            ffmpeg_cmd = [
+                "ffmpeg",
+                "-nostats",
+                "-loglevel", "error",
+                "-f", "concat",
+                "-safe", "0",
+                "-thread_queue_size", "1024",
+                "-fflags", "+genpts+igndts",
+                "-i", concat_path,
+                "-c", "copy",
+                "-avoid_negative_ts", "make_zero",
+                # A pipe can't be seeked back to write the moov atom, so emit
+                # fragmented MP4 with the moov up front
+                "-f", "mp4",
+                "-movflags", "+frag_keyframe+empty_moov+default_base_moof",
+                "pipe:1"
+            ]
+            process = subprocess.Popen(
+                ffmpeg_cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            reader, stderr_tail = tail_stderr(process)
+            try:
+                print(f"📡 Streaming export of {len(segments)} segments")
+                yield from iter(lambda: process.stdout.read(STREAM_CHUNK_SIZE), b'')
+                returncode = process.wait()
+                if returncode != 0:
+                    stderr_text = b"".join(stderr_tail).decode("utf-8", errors="replace")
+                    raise VideoExportError(f"FFmpeg failed: {stderr_text}")
+            finally:
+                # Also reached when the client disconnects mid-stream
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                reader.join()
+                process.stdout.close()
+                process.stderr.close()
+        finally:
+            # Also reached when Popen itself fails (e.g. ffmpeg missing)
+            close_concat_list(concat_path, concat_writer)
+
+
 def get_export_filename(analysis_id: str, timeline_name: Optional[str] = None) -> str:
     """
     Generate a filename for the exported video.
@@ -4,9 +4,14 @@ Implements the new strategy of storing real video segments instead of references
 """
 
 import os
+import json
 import subprocess
 import logging
-from typing import List, Dict, Any, Optional
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Any, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -14,13 +19,155 @@ class VideoSegmentationError(Exception):
     """Custom exception for video segmentation errors."""
     pass
 
+# Lines of ffmpeg stderr kept for error reports
+FFMPEG_STDERR_TAIL_LINES = 200
+
+def run_ffmpeg(command: List[str], timeout: Optional[float] = 600) -> Tuple[int, str]:
+    """
+    Run an ffmpeg command with stdout discarded and only the tail of
+    stderr kept, so memory stays flat however long the job runs.
+    Progress output is turned off; only errors are logged by ffmpeg.
+    
+    Args:
+        command: ffmpeg argv, starting with the executable
+        timeout: Seconds before the process is killed (None to wait forever)
+        
+    Returns:
+        (returncode, last lines of stderr)
+        
+    Raises:
+        subprocess.TimeoutExpired: If the timeout is hit (the process is killed)
+    """
+    command = [command[0], "-nostats", "-loglevel", "error", *command[1:]]
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        bufsize=1024 * 1024
+    )
+    reader, tail = tail_stderr(process)
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        reader.join()
+        process.stderr.close()
+
+    return returncode, b"".join(tail).decode("utf-8", errors="replace")
+
+def tail_stderr(process: subprocess.Popen) -> Tuple[threading.Thread, deque]:
+    """
+    Drain a process's stderr pipe on a background thread, keeping only the
+    last FFMPEG_STDERR_TAIL_LINES lines so the pipe never fills up.
+    
+    Returns:
+        (reader thread, deque of the last stderr lines as bytes)
+    """
+    tail = deque(maxlen=FFMPEG_STDERR_TAIL_LINES)
+
+    def drain_stderr():
+        for line in process.stderr:
+            tail.append(line)
+
+    reader = threading.Thread(target=drain_stderr, daemon=True)
+    reader.start()
+    return reader, tail
+
+# Hardware H.264 encoders in order of preference. VAAPI is left out because
+# it needs frames uploaded to a device surface, which the software scale
+# filters used below don't do.
+HW_ENCODER_CANDIDATES = ["h264_nvenc", "h264_qsv", "h264_videotoolbox"]
+
+# Concurrent hardware encode sessions allowed across all scene workers.
+# Consumer NVIDIA cards cap sessions per system (3 on older drivers), and
+# sessions past the cap fail at runtime rather than queueing.
+HW_ENCODER_MAX_SESSIONS = int(os.getenv("FFMPEG_HW_MAX_SESSIONS", "3"))
+
+@functools.lru_cache(maxsize=1)
+def _detect_hw_encoder() -> str:
+    """
+    Pick the H.264 encoder for segment generation, once per process.
+    
+    FFMPEG_HW_ENCODER overrides detection (e.g. "libx264" to force CPU).
+    Otherwise each hardware encoder ffmpeg was built with is tried on a
+    tiny test encode, since being compiled in doesn't mean the device
+    or driver is present.
+    
+    Returns:
+        str: Encoder name, "libx264" when no hardware encoder works
+    """
+    override = os.getenv("FFMPEG_HW_ENCODER")
+    if override:
+        return override
+
+    try:
+        listing = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return "libx264"
+
+    for encoder in HW_ENCODER_CANDIDATES:
+        if encoder not in listing:
+            continue
+        try:
+            probe = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-loglevel", "error",
+                 "-f", "lavfi", "-i", "color=black:s=256x256:d=0.1",
+                 "-c:v", encoder, "-f", "null", "-"],
+                capture_output=True, text=True, timeout=15
+            )
+        except subprocess.TimeoutExpired:
+            continue
+        if probe.returncode == 0:
+            logger.info(f"Using hardware encoder {encoder} for segments")
+            return encoder
+
+    return "libx264"
+
+def _video_encoder_args(crf: int, x264_preset: str, encoder: Optional[str] = None) -> List[str]:
+    """
+    Codec and rate-control flags at a CRF-like quality, for `encoder` or
+    the detected one.
+    """
+    encoder = encoder or _detect_hw_encoder()
+    if encoder == "h264_nvenc":
+        return ["-c:v", encoder, "-preset", "p4", "-tune", "hq", "-rc", "vbr", "-cq", str(crf)]
+    if encoder == "h264_qsv":
+        return ["-c:v", encoder, "-preset", "fast", "-global_quality", str(crf)]
+    if encoder == "h264_videotoolbox":
+        # -q:v runs 1-100, higher is better
+        return ["-c:v", encoder, "-q:v", str(max(1, 100 - 2 * crf))]
+    return ["-c:v", encoder, "-preset", x264_preset, "-crf", str(crf)]
+
+def _decode_thread_args(threads: int) -> List[str]:
+    """Input-side -threads flag; 0 leaves ffmpeg's one-thread-per-core default."""
+    return ["-threads", str(threads)] if threads > 0 else []
+
+def _input_hwaccel_args() -> List[str]:
+    """
+    Input flags for hardware decode alongside NVENC. Frames are downloaded
+    after decode (no -hwaccel_output_format cuda) so the software scale
+    filter still applies; ffmpeg falls back to CPU decode for codecs
+    the GPU can't handle.
+    """
+    if _detect_hw_encoder() == "h264_nvenc":
+        return ["-hwaccel", "cuda"]
+    return []
+
 def generate_segment(
     original_full_video_path: str,
     output_segment_path: str,
     segment_start_original: float,
     segment_duration: float,
     ffmpeg_settings: List[str],
-    overwrite: bool = True
+    overwrite: bool = True,
+    decode_threads: int = 0
 ) -> bool:
     """
     Generate a video segment using FFmpeg.
@@ -32,6 +179,7 @@ def generate_segment(
         segment_duration: Duration of the segment (seconds)
         ffmpeg_settings: List of FFmpeg settings/flags
         overwrite: Whether to overwrite existing files
+        decode_threads: Decoder threads for the input (0 = ffmpeg's default)
         
     Returns:
         bool: True if successful, False otherwise
@@ -42,14 +190,16 @@ def generate_segment(
     try:
         # Ensure output directory exists
         output_dir = os.path.dirname(output_segment_path)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir, exist_ok=True)
+        if output_dir:
+            _ensure_dir(output_dir)
             
         # Build FFmpeg command
         command = [
             "ffmpeg",
             "-y" if overwrite else "-n",  # Overwrite or not
-            "-ss", str(segment_start_original),  # Seek to start time
+            *_input_hwaccel_args(),              # GPU decode when encoding on NVENC
+            *_decode_thread_args(decode_threads),  # Input-side thread cap
+            "-ss", str(segment_start_original),  # Seek to start time (frame-accurate when transcoding)
             "-i", original_full_video_path,      # Input file
             "-t", str(segment_duration),         # Duration
             *ffmpeg_settings,                    # Apply specific settings
@@ -66,19 +216,14 @@ def generate_segment(
             logger.error(error_msg)
             raise VideoSegmentationError(error_msg)
 
-        process = subprocess.run(
+        returncode, stderr_tail = run_ffmpeg(
             command,
-            capture_output=True,
-            text=True,
-            check=False,
             timeout=600  # 10 minute timeout (increased for large files)
         )
 
-        if process.returncode != 0:
-            error_msg = f"FFmpeg failed (code {process.returncode}) for {output_segment_path}"
+        if returncode != 0:
+            error_msg = f"FFmpeg failed (code {returncode}) for {output_segment_path}: {stderr_tail}"
             logger.error(f"{error_msg}")
-            logger.error(f"FFmpeg stderr: {process.stderr}")
-            logger.error(f"FFmpeg stdout: {process.stdout}")
             raise VideoSegmentationError(error_msg)
 
         # Verify output file was created
@@ -94,33 +239,200 @@ def generate_segment(
         error_msg = f"FFmpeg timeout for segment generation: {output_segment_path}"
         logger.error(error_msg)
         raise VideoSegmentationError(error_msg)
+    except VideoSegmentationError:
+        raise
     except Exception as e:
         error_msg = f"Unexpected error during segment generation: {str(e)}"
         logger.error(error_msg)
         raise VideoSegmentationError(error_msg)
 
-def get_proxy_ffmpeg_settings() -> List[str]:
-    """Get FFmpeg settings for proxy (low-res preview) segments optimized for VM."""
+def _segment_sidecar_path(segment_path: str) -> str:
+    """Path of the JSON file recording what a segment was cut from."""
+    return f"{segment_path}.json"
+
+def _write_segment_sidecar(segment_path: str, source_path: str, start: float, duration: float) -> None:
+    """Record the source range a segment was generated from."""
+    try:
+        with open(_segment_sidecar_path(segment_path), "w") as f:
+            json.dump({
+                "source_mtime_ns": os.stat(source_path).st_mtime_ns,
+                "start": start,
+                "duration": duration
+            }, f)
+    except OSError as e:
+        logger.warning(f"Could not write segment sidecar for {segment_path}: {e}")
+
+def _segment_is_current(segment_path: str, source_path: str, start: float, duration: float) -> bool:
+    """
+    True if the segment exists, is newer than the source, and its sidecar
+    records exactly this start and duration from the current source.
+    """
+    try:
+        segment_mtime_ns = os.stat(segment_path).st_mtime_ns
+        source_mtime_ns = os.stat(source_path).st_mtime_ns
+        with open(_segment_sidecar_path(segment_path)) as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (
+        segment_mtime_ns > source_mtime_ns
+        and sidecar.get("source_mtime_ns") == source_mtime_ns
+        and abs(sidecar.get("start", -1) - start) < 1e-6
+        and abs(sidecar.get("duration", -1) - duration) < 1e-6
+    )
+
+def generate_segments(
+    original_full_video_path: str,
+    outputs: List[Tuple[str, List[str]]],
+    segment_start_original: float,
+    segment_duration: float,
+    decode_threads: int = 0
+) -> Dict[str, Optional[str]]:
+    """
+    Generate several encodings of the same time range with one FFmpeg
+    process, so the source is seeked and decoded only once. Each
+    successful output gets a sidecar recording the range it was cut from.
+    
+    Args:
+        original_full_video_path: Path to the original full video
+        outputs: (output_segment_path, ffmpeg_settings) pairs
+        segment_start_original: Start time in the original video (seconds)
+        segment_duration: Duration of the segment (seconds)
+        decode_threads: Decoder threads for the input (0 = ffmpeg's default)
+        
+    Returns:
+        Dict mapping each output path to None on success or an error message
+    """
+    # Outputs are about to be overwritten, so their old sidecars no longer apply
+    for output_path, _ in outputs:
+        try:
+            os.remove(_segment_sidecar_path(output_path))
+        except OSError:
+            pass
+
+    results = _run_segments(original_full_video_path, outputs,
+                            segment_start_original, segment_duration, decode_threads)
+
+    for output_path, error in results.items():
+        if error is None:
+            _write_segment_sidecar(output_path, original_full_video_path,
+                                   segment_start_original, segment_duration)
+    return results
+
+def _run_segments(
+    original_full_video_path: str,
+    outputs: List[Tuple[str, List[str]]],
+    segment_start_original: float,
+    segment_duration: float,
+    decode_threads: int = 0
+) -> Dict[str, Optional[str]]:
+    """FFmpeg side of generate_segments."""
+    if len(outputs) == 1:
+        output_path, settings = outputs[0]
+        try:
+            generate_segment(original_full_video_path, output_path,
+                             segment_start_original, segment_duration, settings,
+                             decode_threads=decode_threads)
+            return {output_path: None}
+        except VideoSegmentationError as e:
+            return {output_path: str(e)}
+
+    if not os.path.exists(original_full_video_path):
+        error_msg = f"Input video file not found: {original_full_video_path}"
+        logger.error(error_msg)
+        return {output_path: error_msg for output_path, _ in outputs}
+
+    command = [
+        "ffmpeg",
+        "-y",
+        *_input_hwaccel_args(),              # GPU decode when encoding on NVENC
+        *_decode_thread_args(decode_threads),  # Input-side thread cap
+        "-ss", str(segment_start_original),  # Seek to start time (frame-accurate when transcoding)
+        "-i", original_full_video_path,      # Input file, decoded once
+    ]
+    for output_path, settings in outputs:
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            _ensure_dir(output_dir)
+        # Each output taps the same decoded streams
+        command += ["-map", "0:v:0"]
+        if "-an" not in settings:
+            command += ["-map", "0:a:0?"]
+        command += [
+            "-t", str(segment_duration),
+            *settings,
+            "-movflags", "+faststart",
+            output_path
+        ]
+
+    logger.info(f"Generating {len(outputs)} segments in one pass: {[path for path, _ in outputs]}")
+    logger.debug(f"FFmpeg command: {' '.join(command)}")
+
+    try:
+        returncode, stderr_tail = run_ffmpeg(command, timeout=600)
+        if returncode == 0 and all(os.path.exists(path) for path, _ in outputs):
+            logger.info(f"Successfully generated segments: {[path for path, _ in outputs]}")
+            return {output_path: None for output_path, _ in outputs}
+        logger.error(f"Combined FFmpeg run failed (code {returncode}): {stderr_tail}")
+    except subprocess.TimeoutExpired:
+        logger.error("Combined FFmpeg run timed out")
+
+    # Retry each output on its own so a failure is attributed to the
+    # encoding that caused it and doesn't take the other one down
+    results = {}
+    for output_path, settings in outputs:
+        try:
+            generate_segment(original_full_video_path, output_path,
+                             segment_start_original, segment_duration, settings,
+                             decode_threads=decode_threads)
+            results[output_path] = None
+        except VideoSegmentationError as e:
+            results[output_path] = str(e)
+    return results
+
+# Directories already created by this process, so per-scene calls skip mkdir
+_created_dirs: Set[str] = set()
+
+def _ensure_dir(path: str) -> None:
+    """os.makedirs(path, exist_ok=True), at most once per path per process."""
+    if path not in _created_dirs:
+        os.makedirs(path, exist_ok=True)
+        _created_dirs.add(path)
+
+def ensure_segment_dirs(analysis_id: str, segments_base_dir: str) -> Tuple[str, str]:
+    """
+    Create the proxy and mezzanine segment directories for an analysis.
+    
+    Returns:
+        (proxy_dir, mezzanine_dir)
+    """
+    analysis_segments_dir = os.path.join(segments_base_dir, analysis_id, "segments")
+    proxy_dir = os.path.join(analysis_segments_dir, "proxy")
+    mezzanine_dir = os.path.join(analysis_segments_dir, "mezzanine")
+    _ensure_dir(proxy_dir)
+    _ensure_dir(mezzanine_dir)
+    return proxy_dir, mezzanine_dir
+
+def get_proxy_ffmpeg_settings(threads: int = 0, encoder: Optional[str] = None) -> List[str]:
+    """Get FFmpeg settings for proxy (low-res preview) segments optimized for VM.
+    threads=0 lets the encoder use all cores; encoder=None uses the detected one."""
     return [
         "-vf", "scale=640:-2",      # Scale to 640px width, maintain aspect ratio
-        "-c:v", "libx264",          # H.264 codec
-        "-preset", "ultrafast",     # Fastest encoding for proxy
-        "-threads", "0",            # Use all available CPU cores
-        "-crf", "28",               # Lower quality for speed
+        *_video_encoder_args(28, "ultrafast", encoder),  # H.264, hardware if available; lower quality for speed
+        "-threads", str(threads),   # Encoder threads (0 = all cores)
         "-an",                      # No audio for proxy
         "-avoid_negative_ts", "make_zero",  # Handle timestamp issues
         "-fflags", "+genpts",       # Generate presentation timestamps
         "-movflags", "+faststart"   # Optimize for web streaming
     ]
 
-def get_mezzanine_ffmpeg_settings() -> List[str]:
-    """Get FFmpeg settings for mezzanine (high-quality) segments optimized for VM."""
+def get_mezzanine_ffmpeg_settings(threads: int = 0, encoder: Optional[str] = None) -> List[str]:
+    """Get FFmpeg settings for mezzanine (high-quality) segments optimized for VM.
+    threads=0 lets the encoder use all cores; encoder=None uses the detected one."""
     return [
         "-vf", "scale=1280:-2",     # Scale to 1280px width, maintain aspect ratio
-        "-c:v", "libx264",          # H.264 codec
-        "-preset", "veryfast",      # Very fast encoding (optimized for VM)
-        "-threads", "0",            # Use all available CPU cores
-        "-crf", "23",               # Good quality
+        *_video_encoder_args(23, "veryfast", encoder),   # H.264, hardware if available; good quality
+        "-threads", str(threads),   # Encoder threads (0 = all cores)
         "-c:a", "aac",              # AAC audio codec
         "-b:a", "128k",             # Audio bitrate
         "-avoid_negative_ts", "make_zero",  # Handle timestamp issues
@@ -128,13 +440,40 @@ def get_mezzanine_ffmpeg_settings() -> List[str]:
         "-movflags", "+faststart"   # Optimize for web streaming
     ]
 
+def _encode_outputs(
+    original_video_path: str,
+    outputs: List[Tuple[str, Callable[..., List[str]]]],
+    start: float,
+    duration: float,
+    threads: int = 0
+) -> Dict[str, Optional[str]]:
+    """
+    Run generate_segments for (output_path, settings_builder) pairs. When a
+    hardware encoder is in use, outputs that fail (e.g. no free encode
+    session) are retried once with libx264.
+    
+    Returns:
+        Dict mapping each output path to None on success or an error message
+    """
+    errors = generate_segments(original_video_path,
+                               [(path, build(threads)) for path, build in outputs],
+                               start, duration, threads)
+    failed = [(path, build) for path, build in outputs if errors[path] is not None]
+    if failed and _detect_hw_encoder() != "libx264":
+        logger.warning(f"Hardware encode failed for {[path for path, _ in failed]}, retrying with libx264")
+        errors.update(generate_segments(original_video_path,
+                                        [(path, build(threads, encoder="libx264")) for path, build in failed],
+                                        start, duration, threads))
+    return errors
+
 def generate_scene_segments(
     analysis_id: str,
     original_video_path: str,
     scene_data: Dict[str, Any],
     segments_base_dir: str,
     generate_proxy: bool = True,
-    generate_mezzanine: bool = True
+    generate_mezzanine: bool = True,
+    ffmpeg_threads: int = 0
 ) -> Dict[str, str]:
     """
     Generate proxy and mezzanine segments for a scene.
@@ -146,6 +485,7 @@ def generate_scene_segments(
         segments_base_dir: Base directory for storing segments
         generate_proxy: Whether to generate proxy segment
         generate_mezzanine: Whether to generate mezzanine segment
+        ffmpeg_threads: Decoder threads and encoder threads per output (0 = all cores)
         
     Returns:
         Dict containing URLs/paths to generated segments
@@ -164,58 +504,112 @@ def generate_scene_segments(
     if duration <= 0:
         raise VideoSegmentationError(f"Invalid scene duration: {duration}")
     
-    # Create separate directories for proxy and mezzanine segments
-    analysis_segments_dir = os.path.join(segments_base_dir, analysis_id, "segments")
-    proxy_dir = os.path.join(analysis_segments_dir, "proxy")
-    mezzanine_dir = os.path.join(analysis_segments_dir, "mezzanine")
-
-    os.makedirs(proxy_dir, exist_ok=True)
-    os.makedirs(mezzanine_dir, exist_ok=True)
+    # Separate directories for proxy and mezzanine segments (created once per analysis)
+    proxy_dir, mezzanine_dir = ensure_segment_dirs(analysis_id, segments_base_dir)
 
     generated_segments = {}
 
-    # Generate proxy segment
+    proxy_filename = f"scene_{scene_id}_proxy.mp4"
+    # ensure_segment_dirs returns normalized directories, so plain concatenation is safe
+    proxy_path = proxy_dir + os.sep + proxy_filename
+    mezzanine_filename = f"scene_{scene_id}_mezzanine.mp4"
+    mezzanine_path = mezzanine_dir + os.sep + mezzanine_filename
+
+    outputs = []
     if generate_proxy:
-        proxy_filename = f"scene_{scene_id}_proxy.mp4"
-        proxy_path = os.path.join(proxy_dir, proxy_filename)
-        
-        try:
-            generate_segment(
-                original_video_path,
-                proxy_path,
-                start_time,
-                duration,
-                get_proxy_ffmpeg_settings()
-            )
+        outputs.append((proxy_path, get_proxy_ffmpeg_settings))
+    if generate_mezzanine:
+        outputs.append((mezzanine_path, get_mezzanine_ffmpeg_settings))
+
+    # Proxy and mezzanine share one seek and decode of the source
+    errors = _encode_outputs(original_video_path, outputs, start_time, duration, ffmpeg_threads) if outputs else {}
+
+    if generate_proxy:
+        if errors[proxy_path] is None:
             generated_segments["proxy_video_path"] = proxy_path
             generated_segments["proxy_video_url"] = f"/api/segment/{analysis_id}/proxy/{proxy_filename}"
-        except VideoSegmentationError as e:
-            logger.error(f"Failed to generate proxy segment for scene {scene_id}: {e}")
-            # Continue with mezzanine generation even if proxy fails
+        else:
+            logger.error(f"Failed to generate proxy segment for scene {scene_id}: {errors[proxy_path]}")
     
-    # Generate mezzanine segment
     if generate_mezzanine:
-        mezzanine_filename = f"scene_{scene_id}_mezzanine.mp4"
-        mezzanine_path = os.path.join(mezzanine_dir, mezzanine_filename)
-        
-        try:
-            generate_segment(
-                original_video_path,
-                mezzanine_path,
-                start_time,
-                duration,
-                get_mezzanine_ffmpeg_settings()
-            )
+        if errors[mezzanine_path] is None:
             generated_segments["mezzanine_video_path"] = mezzanine_path
             generated_segments["mezzanine_video_url"] = f"/api/segment/{analysis_id}/mezzanine/{mezzanine_filename}"
-        except VideoSegmentationError as e:
-            logger.error(f"Failed to generate mezzanine segment for scene {scene_id}: {e}")
+        else:
+            logger.error(f"Failed to generate mezzanine segment for scene {scene_id}: {errors[mezzanine_path]}")
     
     if not generated_segments:
         raise VideoSegmentationError(f"Failed to generate any segments for scene {scene_id}")
     
     return generated_segments
 
+def generate_all_scene_segments(
+    analysis_id: str,
+    original_video_path: str,
+    scenes: List[Dict[str, Any]],
+    segments_base_dir: str,
+    generate_proxy: bool = True,
+    generate_mezzanine: bool = True,
+    max_workers: Optional[int] = None
+) -> List[Optional[Dict[str, str]]]:
+    """
+    Generate proxy and mezzanine segments for many scenes concurrently.
+    
+    Each scene is an independent FFmpeg process, so a thread pool is enough
+    to keep several encodes running; decoder and encoder threads per process
+    are capped so the concurrent encodes share the cores instead of
+    oversubscribing them.
+    
+    Args:
+        analysis_id: Analysis ID for organizing files
+        original_video_path: Path to the original full video
+        scenes: Scene metadata dicts containing start, end, sceneId
+        segments_base_dir: Base directory for storing segments
+        generate_proxy: Whether to generate proxy segments
+        generate_mezzanine: Whether to generate mezzanine segments
+        max_workers: Concurrent scenes (default: half the CPU count; capped by
+            HW_ENCODER_MAX_SESSIONS when encoding on hardware)
+        
+    Returns:
+        Generated segment info per scene, in the same order as `scenes`;
+        None for scenes that failed (the error is logged)
+    """
+    cpu_count = os.cpu_count() or 2
+    workers = max_workers or max(1, cpu_count // 2)
+    outputs_per_scene = int(generate_proxy) + int(generate_mezzanine)
+    if outputs_per_scene and _detect_hw_encoder() != "libx264":
+        # Each scene holds one encode session per output
+        workers = min(workers, max(1, HW_ENCODER_MAX_SESSIONS // outputs_per_scene))
+    threads = max(2, cpu_count // workers)
+    ensure_segment_dirs(analysis_id, segments_base_dir)
+    
+    results: List[Optional[Dict[str, str]]] = [None] * len(scenes)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                generate_scene_segments,
+                analysis_id,
+                original_video_path,
+                scene_data,
+                segments_base_dir,
+                generate_proxy,
+                generate_mezzanine,
+                threads
+            ): i
+            for i, scene_data in enumerate(scenes)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            scene_id = scenes[i].get("sceneId")
+            try:
+                results[i] = future.result()
+            except VideoSegmentationError as e:
+                logger.error(f"Failed to generate segments for scene {scene_id}: {e}")
+            except Exception as e:
+                logger.error(f"Unexpected error generating segments for scene {scene_id}: {e}")
+    
+    return results
+
 def regenerate_scene_segments(
     analysis_id: str,
     original_video_path: str,
@@ -246,55 +640,44 @@ def regenerate_scene_segments(
     if not scene_id:
         raise VideoSegmentationError("Scene data missing sceneId")
     
-    analysis_segments_dir = os.path.join(segments_base_dir, analysis_id, "segments")
-    proxy_dir = os.path.join(analysis_segments_dir, "proxy")
-    mezzanine_dir = os.path.join(analysis_segments_dir, "mezzanine")
-
-    os.makedirs(proxy_dir, exist_ok=True)
-    os.makedirs(mezzanine_dir, exist_ok=True)
+    # Separate directories for proxy and mezzanine segments (created once per analysis)
+    proxy_dir, mezzanine_dir = ensure_segment_dirs(analysis_id, segments_base_dir)
 
     regenerated_segments = {}
 
-    # Regenerate proxy if path provided or determine default path
-    if existing_proxy_path or True:  # Always try to regenerate proxy
-        if not existing_proxy_path:
-            proxy_filename = f"scene_{scene_id}_proxy.mp4"
-            existing_proxy_path = os.path.join(proxy_dir, proxy_filename)
-        
-        try:
-            generate_segment(
-                original_video_path,
-                existing_proxy_path,
-                new_start_original,
-                new_duration,
-                get_proxy_ffmpeg_settings(),
-                overwrite=True
-            )
-            regenerated_segments["proxy_video_path"] = existing_proxy_path
-            proxy_filename = os.path.basename(existing_proxy_path)
-            regenerated_segments["proxy_video_url"] = f"/api/segment/{analysis_id}/proxy/{proxy_filename}"
-        except VideoSegmentationError as e:
-            logger.error(f"Failed to regenerate proxy segment for scene {scene_id}: {e}")
+    # Always regenerate both, falling back to the default paths
+    if not existing_proxy_path:
+        existing_proxy_path = os.path.join(proxy_dir, f"scene_{scene_id}_proxy.mp4")
+    if not existing_mezzanine_path:
+        existing_mezzanine_path = os.path.join(mezzanine_dir, f"scene_{scene_id}_mezzanine.mp4")
+
+    outputs = [
+        (existing_proxy_path, get_proxy_ffmpeg_settings),
+        (existing_mezzanine_path, get_mezzanine_ffmpeg_settings)
+    ]
+    # Segments already cut from this exact range don't need re-encoding
+    errors = {
+        path: None for path, _ in outputs
+        if _segment_is_current(path, original_video_path, new_start_original, new_duration)
+    }
+    if len(errors) == len(outputs):
+        logger.info(f"Segments for scene {scene_id} already match the requested range, skipping regeneration")
+    pending = [output for output in outputs if output[0] not in errors]
+    if pending:
+        errors.update(_encode_outputs(original_video_path, pending, new_start_original, new_duration))
+
+    if errors[existing_proxy_path] is None:
+        regenerated_segments["proxy_video_path"] = existing_proxy_path
+        proxy_filename = os.path.basename(existing_proxy_path)
+        regenerated_segments["proxy_video_url"] = f"/api/segment/{analysis_id}/proxy/{proxy_filename}"
+    else:
+        logger.error(f"Failed to regenerate proxy segment for scene {scene_id}: {errors[existing_proxy_path]}")
     
-    # Regenerate mezzanine if path provided or determine default path
-    if existing_mezzanine_path or True:  # Always try to regenerate mezzanine
-        if not existing_mezzanine_path:
-            mezzanine_filename = f"scene_{scene_id}_mezzanine.mp4"
-            existing_mezzanine_path = os.path.join(mezzanine_dir, mezzanine_filename)
-        
-        try:
-            generate_segment(
-                original_video_path,
-                existing_mezzanine_path,
-                new_start_original,
-                new_duration,
-                get_mezzanine_ffmpeg_settings(),
-                overwrite=True
-            )
-            regenerated_segments["mezzanine_video_path"] = existing_mezzanine_path
-            mezzanine_filename = os.path.basename(existing_mezzanine_path)
-            regenerated_segments["mezzanine_video_url"] = f"/api/segment/{analysis_id}/mezzanine/{mezzanine_filename}"
-        except VideoSegmentationError as e:
-            logger.error(f"Failed to regenerate mezzanine segment for scene {scene_id}: {e}")
+    if errors[existing_mezzanine_path] is None:
+        regenerated_segments["mezzanine_video_path"] = existing_mezzanine_path
+        mezzanine_filename = os.path.basename(existing_mezzanine_path)
+        regenerated_segments["mezzanine_video_url"] = f"/api/segment/{analysis_id}/mezzanine/{mezzanine_filename}"
+    else:
+        logger.error(f"Failed to regenerate mezzanine segment for scene {scene_id}: {errors[existing_mezzanine_path]}")
     
     return regenerated_segments
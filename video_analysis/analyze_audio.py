@@ -3,102 +3,120 @@
 import json
 import os
 import sys
+import subprocess
+import math
 import numpy as np
-from moviepy.editor import VideoFileClip
-import contextlib # For redirecting stdout/stderr
 
-# Helper for temporarily suppressing stdout/stderr
-@contextlib.contextmanager
-def suppress_stdout_stderr():
-    """A context manager that redirects stdout and stderr to devnull"""
-    original_stdout = sys.stdout
-    original_stderr = sys.stderr
-    devnull = open(os.devnull, 'w')
-    try:
-        sys.stdout = devnull
-        sys.stderr = devnull
-        yield
-    finally:
-        sys.stdout = original_stdout
-        sys.stderr = original_stderr
-        devnull.close()
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Volume gating only needs one RMS value per interval, so decode at a low
+# rate: 8 kHz mono still gives thousands of samples per window while
+# touching a fraction of the bytes of 44.1/48 kHz stereo.
+ANALYSIS_SAMPLE_RATE = 8000
+
+def _interval_rms_numpy(audio_array, samples_per_interval):
+    """
+    RMS of each consecutive window of `samples_per_interval` samples.
+    The trailing partial window, if any, is included as a final value.
+    """
+    n_full = len(audio_array) // samples_per_interval
+    head = audio_array[:n_full * samples_per_interval].reshape(n_full, samples_per_interval)
+    # einsum sums the squares row-wise without materializing head**2
+    rms = np.sqrt(np.einsum('ij,ij->i', head, head) / samples_per_interval)
+
+    tail = audio_array[n_full * samples_per_interval:]
+    if tail.size:
+        rms = np.append(rms, np.sqrt(np.dot(tail, tail) / tail.size))
+    return rms
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _interval_rms_jit(audio_array, samples_per_interval):
+        n_samples = audio_array.shape[0]
+        n = (n_samples + samples_per_interval - 1) // samples_per_interval
+        out = np.empty(n, dtype=np.float64)
+        for i in prange(n):
+            s = i * samples_per_interval
+            e = min(s + samples_per_interval, n_samples)
+            acc = 0.0
+            for j in range(s, e):
+                v = audio_array[j]
+                acc += v * v
+            out[i] = math.sqrt(acc / (e - s))
+        return out
+
+def _interval_rms(audio_array, samples_per_interval):
+    """
+    Per-interval RMS, using the compiled parallel kernel when numba is
+    installed and the NumPy implementation otherwise.
+    """
+    if NUMBA_AVAILABLE:
+        return _interval_rms_jit(audio_array, samples_per_interval)
+    return _interval_rms_numpy(audio_array, samples_per_interval)
+
+def decode_audio_pcm(video_path, sample_rate):
+    """
+    Decode the first audio track of a video to mono PCM at `sample_rate`
+    with a single ffmpeg pass. Returns a float32 array in [-1, 1], or None
+    if the video has no audio track.
+    """
+    command = [
+        'ffmpeg', '-nostdin', '-loglevel', 'error',
+        '-i', video_path,
+        '-map', '0:a:0',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', 'f32le',
+        '-'
+    ]
+    process = subprocess.run(command, capture_output=True)
+    if process.returncode != 0:
+        stderr = process.stderr.decode(errors='replace')
+        if 'matches no streams' in stderr:
+            return None
+        raise RuntimeError(f"ffmpeg audio decode failed: {stderr.strip()}")
+
+    # ffmpeg already emits mono float samples, so this is a zero-copy view
+    return np.frombuffer(process.stdout, dtype=np.float32)
 
-def analyze_audio(video_path, interval=1.0, high_energy_threshold=0.7):
+def analyze_audio(video_path, interval=1.0, high_energy_threshold=0.7, sample_rate=ANALYSIS_SAMPLE_RATE):
     """
     Analyze audio volume from a video file to estimate scene energy.
     """
     try:
-        # Load the video file, suppress console output from MoviePy
-        with suppress_stdout_stderr(): # Suppress MoviePy's own console output
-            with VideoFileClip(video_path) as video:
-                if video.audio is None:
-                    # Print to original stderr if needed for actual warnings
-                    print("Warning: No audio track found in the video", file=sys.__stderr__)
-                    return []
-                
-                audio = video.audio
-                # Specify target fps for to_soundarray if you want to resample
-                # If not, it uses audio.fps by default.
-                audio_array = audio.to_soundarray(fps=audio.fps) 
-        
-        # Continue with processing audio_array (which is now outside the suppress block)
-        if len(audio_array.shape) > 1 and audio_array.shape[1] > 1:
-            audio_array = np.mean(audio_array, axis=1)
-        
-        # Use the duration obtained from the VideoFileClip context
-        # This duration should be from the clip object before it's closed
-        # So, it's better to get it while 'video' (the clip) is still in scope
-        # For this, we might need to extract duration within the suppress block
-        # Or, rely on metadata from extract_metadata.py passed in, which is cleaner.
-        # For now, let's re-open briefly to get duration if not passed in.
-        # A better design would be to pass duration from the metadata step.
+        audio_array = decode_audio_pcm(video_path, sample_rate)
+        if audio_array is None:
+            print("Warning: No audio track found in the video", file=sys.stderr)
+            return []
 
-        # Re-open briefly (and silently) just for duration if not available elsewhere
-        # This is inefficient but works if duration isn't passed.
-        temp_duration = 0
-        with suppress_stdout_stderr():
-             with VideoFileClip(video_path) as temp_clip:
-                 temp_duration = temp_clip.duration
-
-        duration = temp_duration # video.duration would be out of scope here
+        duration = len(audio_array) / sample_rate
 
         num_intervals = int(np.ceil(duration / interval))
         
-        samples_per_interval = int(audio.fps * interval) # audio.fps is from the first clip opening
+        samples_per_interval = int(sample_rate * interval)
         
-        volume_data = []
+        rms = _interval_rms(audio_array, samples_per_interval)[:num_intervals]
+        normalized = np.where(rms > 1e-5, np.minimum(1.0, rms / 0.05), 0.0)
+        high_energy = normalized >= high_energy_threshold
         
-        for i in range(num_intervals):
-            start_time = i * interval
-            end_time = min((i + 1) * interval, duration)
-            
-            start_idx = int(start_time * audio.fps)
-            end_idx = min(int(end_time * audio.fps), len(audio_array))
-            
-            if start_idx >= end_idx:
-                continue
-            
-            segment = audio_array[start_idx:end_idx]
-            
-            if segment.size == 0:
-                volume = 0.0
-            else:
-                volume = np.sqrt(np.mean(segment**2))
-
-            normalized_volume = min(1.0, volume / 0.05 if volume > 1e-5 else 0.0) 
-            is_high_energy = normalized_volume >= high_energy_threshold
-            
-            volume_data.append({
-                "start": round(start_time, 2),
-                "end": round(end_time, 2),
-                "volume": round(normalized_volume, 3),
-                "high_energy": int(is_high_energy)
-            })
+        volume_data = [
+            {
+                "start": round(i * interval, 2),
+                "end": round(min((i + 1) * interval, duration), 2),
+                "volume": round(volume, 3),
+                "high_energy": int(is_high)
+            }
+            for i, (volume, is_high) in enumerate(zip(normalized.tolist(), high_energy.tolist()))
+        ]
         
         return volume_data
     
     except Exception as e:
-        print(f"Error analyzing audio: {str(e)}", file=sys.__stderr__) # Print to original stderr
+        print(f"Error analyzing audio: {str(e)}", file=sys.stderr)
         return None
 
 def main():
@@ -4,12 +4,19 @@ import json
 import os
 import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from extract_metadata import extract_metadata
 from detect_scenes import detect_scenes # detect_scenes will now also return transition type
 from analyze_audio import analyze_audio
 
 def analyze_video(video_path, scene_threshold=30.0, fade_threshold=5.0, # Added fade_threshold
-                 audio_interval=1.0, audio_threshold=0.7, segmentation_method="cut-based"):
+                 audio_interval=1.0, audio_threshold=0.7, segmentation_method="cut-based",
+                 downscale_factor=None):
     """
     Perform comprehensive analysis on a video file.
 
@@ -20,6 +27,7 @@ def analyze_video(video_path, scene_threshold=30.0, fade_threshold=5.0, # Added
         audio_interval (float): Interval for audio analysis
         audio_threshold (float): Threshold for high energy audio detection
         segmentation_method (str): Method for segmentation - "cut-based" or "ai-based"
+        downscale_factor (int): Fixed frame downscale for scene detection (None = automatic)
 
     Returns:
         dict: Combined analysis results
@@ -27,49 +35,66 @@ def analyze_video(video_path, scene_threshold=30.0, fade_threshold=5.0, # Added
     try:
         print(f"Analyzing video: {os.path.basename(video_path)}", file=sys.stderr)
 
-        print("Extracting metadata...", file=sys.stderr)
-        metadata = extract_metadata(video_path)
-        if not metadata:
-            raise Exception("Failed to extract metadata")
-
-        print(f"Detecting scenes using {segmentation_method} method...", file=sys.stderr)
-
-        if segmentation_method == "ai-based":
-            print("DEBUG: Attempting AI-based segmentation...", file=sys.stderr)
-            # Import AI segmentation module (we'll create this)
-            try:
-                from ai_segmentation import detect_scenes_ai
-                print("DEBUG: Successfully imported ai_segmentation module", file=sys.stderr)
-                scenes = detect_scenes_ai(video_path, content_threshold=scene_threshold, fade_threshold=fade_threshold)
-                print(f"DEBUG: AI segmentation returned {len(scenes) if scenes else 0} scenes", file=sys.stderr)
-            except ImportError as e:
-                print(f"Warning: AI segmentation not available ({str(e)}), falling back to cut-based detection", file=sys.stderr)
-                scenes = detect_scenes(video_path, content_threshold=scene_threshold, fade_threshold=fade_threshold)
-            except Exception as e:
-                print(f"Error in AI segmentation ({str(e)}), falling back to cut-based detection", file=sys.stderr)
-                scenes = detect_scenes(video_path, content_threshold=scene_threshold, fade_threshold=fade_threshold)
-        else:
-            print("DEBUG: Using cut-based segmentation...", file=sys.stderr)
-            # Use existing cut-based detection
-            scenes = detect_scenes(video_path, content_threshold=scene_threshold, fade_threshold=fade_threshold)
-        if scenes is None:
-            raise Exception("Failed to detect scenes")
-        if len(scenes) == 0:
-            print("Warning: No scenes detected in the video", file=sys.stderr)
-            # Create a single scene spanning the whole video if none detected
-            scenes = [{
-                "start": 0,
-                "end": metadata["duration"],
-                "transition_type": "cut" # Default for a single, all-encompassing scene
-            }]
-
-        print("Analyzing audio...", file=sys.stderr)
-        audio_data = analyze_audio(video_path, interval=audio_interval,
-                                  high_energy_threshold=audio_threshold)
+        # Audio analysis (ffmpeg decode + numpy) is independent of scene
+        # detection (video decode), so run it alongside instead of after
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            print("Analyzing audio...", file=sys.stderr)
+            audio_future = pool.submit(analyze_audio, video_path, interval=audio_interval,
+                                       high_energy_threshold=audio_threshold)
+
+            print("Extracting metadata...", file=sys.stderr)
+            metadata = extract_metadata(video_path)
+            if not metadata:
+                raise Exception("Failed to extract metadata")
+
+            print(f"Detecting scenes using {segmentation_method} method...", file=sys.stderr)
+
+            if segmentation_method == "ai-based":
+                print("DEBUG: Attempting AI-based segmentation...", file=sys.stderr)
+                # Import AI segmentation module (we'll create this)
+                try:
+                    from ai_segmentation import detect_scenes_ai
+                    print("DEBUG: Successfully imported ai_segmentation module", file=sys.stderr)
+                    scenes = detect_scenes_ai(video_path, content_threshold=scene_threshold, fade_threshold=fade_threshold,
+                                              downscale_factor=downscale_factor)
+                    print(f"DEBUG: AI segmentation returned {len(scenes) if scenes else 0} scenes", file=sys.stderr)
+                except ImportError as e:
+                    print(f"Warning: AI segmentation not available ({str(e)}), falling back to cut-based detection", file=sys.stderr)
+                    scenes = detect_scenes(video_path, content_threshold=scene_threshold, fade_threshold=fade_threshold,
+                                           downscale_factor=downscale_factor)
+                except Exception as e:
+                    print(f"Error in AI segmentation ({str(e)}), falling back to cut-based detection", file=sys.stderr)
+                    scenes = detect_scenes(video_path, content_threshold=scene_threshold, fade_threshold=fade_threshold,
+                                           downscale_factor=downscale_factor)
+            else:
+                print("DEBUG: Using cut-based segmentation...", file=sys.stderr)
+                # Use existing cut-based detection
+                scenes = detect_scenes(video_path, content_threshold=scene_threshold, fade_threshold=fade_threshold,
+                                       downscale_factor=downscale_factor)
+            if scenes is None:
+                raise Exception("Failed to detect scenes")
+            if len(scenes) == 0:
+                print("Warning: No scenes detected in the video", file=sys.stderr)
+                # Create a single scene spanning the whole video if none detected
+                scenes = [{
+                    "start": 0,
+                    "end": metadata["duration"],
+                    "transition_type": "cut" # Default for a single, all-encompassing scene
+                }]
+
+            audio_data = audio_future.result()
+
         if audio_data is None:
             print("Warning: Audio analysis failed, continuing without audio data", file=sys.stderr)
             audio_data = []
 
+        # Audio intervals are consecutive, so per-scene overlaps are found
+        # by binary search over their start/end times
+        audio_starts = np.array([a["start"] for a in audio_data], dtype=float)
+        audio_ends = np.array([a["end"] for a in audio_data], dtype=float)
+        audio_volumes = np.array([a["volume"] for a in audio_data], dtype=float)
+        audio_high_energy = np.array([a["high_energy"] for a in audio_data], dtype=bool)
+
         enhanced_scenes = []
 
         for i, scene_info in enumerate(scenes):
@@ -78,18 +103,15 @@ def analyze_video(video_path, scene_threshold=30.0, fade_threshold=5.0, # Added
             # transition_type will be associated with the beginning of this scene
             transition_type = scene_info.get("transition_type", "cut")
 
-            scene_audio = []
-            for audio_item in audio_data:
-                if (audio_item["start"] <= scene_end and
-                    audio_item["end"] >= scene_start):
-                    scene_audio.append(audio_item)
+            # Intervals touching the scene: end >= scene_start and start <= scene_end
+            lo = np.searchsorted(audio_ends, scene_start, side="left")
+            hi = np.searchsorted(audio_starts, scene_end, side="right")
 
             avg_volume = 0
             high_energy = False
-            if scene_audio:
-                total_volume = sum(a["volume"] for a in scene_audio)
-                avg_volume = round(total_volume / len(scene_audio), 3)
-                high_energy = any(a["high_energy"] for a in scene_audio)
+            if hi > lo:
+                avg_volume = round(float(audio_volumes[lo:hi].mean()), 3)
+                high_energy = bool(audio_high_energy[lo:hi].any())
 
             enhanced_scene = {
                 "scene_index": i, # Add a scene index
@@ -112,15 +134,25 @@ def analyze_video(video_path, scene_threshold=30.0, fade_threshold=5.0, # Added
             }
         }
 
-        result_str = json.dumps(result)
-        result = json.loads(result_str)
-
         return result
 
     except Exception as e:
         print(f"Error analyzing video: {str(e)}", file=sys.stderr)
         return None
 
+def _json_default(obj):
+    """Serialize NumPy scalars that slip into the result as plain Python values."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dump_json(result):
+    """Indented JSON bytes for the result, via orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(result, default=_json_default,
+                            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(result, indent=2, default=_json_default).encode()
+
 def main():
     parser = argparse.ArgumentParser(description="Analyze video and extract metadata, scenes, text, and audio information")
 
@@ -137,6 +169,8 @@ def main():
     parser.add_argument("--segmentation-method", type=str, default="cut-based",
                         choices=["cut-based", "ai-based"],
                         help="Segmentation method: cut-based (fast) or ai-based (smart, default: cut-based)")
+    parser.add_argument("--downscale-factor", type=int, default=None,
+                        help="Shrink frames by this factor before scene detection (default: automatic, ~256px wide)")
 
     args = parser.parse_args()
 
@@ -154,7 +188,8 @@ def main():
         fade_threshold=args.fade_threshold, # Pass new threshold
         audio_interval=args.audio_interval,
         audio_threshold=args.audio_threshold,
-        segmentation_method=args.segmentation_method
+        segmentation_method=args.segmentation_method,
+        downscale_factor=args.downscale_factor
     )
 
     if not result:
@@ -162,14 +197,14 @@ def main():
 
     if args.output:
         try:
-            with open(args.output, 'w') as f:
-                json.dump(result, f, indent=2)
+            with open(args.output, 'wb') as f:
+                f.write(_dump_json(result))
             print(f"Analysis complete. Results saved to {args.output}", file=sys.stderr)
         except Exception as e:
             print(f"Error writing to output file: {str(e)}", file=sys.stderr)
             sys.exit(1)
     else:
-        print(json.dumps(result, indent=2))
+        print(_dump_json(result).decode())
 
 if __name__ == "__main__":
     main()
@@ -1,31 +1,66 @@
 # --- START OF FILE extract_metadata.py ---
+"""
+Video metadata extraction. Requires ffprobe on PATH; OpenCV is only used
+as a fallback when ffprobe finds no video stream.
+"""
 
+import copy
+import functools
+from fractions import Fraction
+import hashlib
 import json
 import os
 import sys
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import cv2
-from moviepy.editor import VideoFileClip
-import contextlib # For redirecting stdout/stderr
-
-# Helper for temporarily suppressing stdout/stderr
-@contextlib.contextmanager
-def suppress_stdout_stderr():
-    """A context manager that redirects stdout and stderr to devnull"""
-    original_stdout = sys.stdout
-    original_stderr = sys.stderr
-    devnull = open(os.devnull, 'w')
-    try:
-        sys.stdout = devnull
-        sys.stderr = devnull
-        yield
-    finally:
-        sys.stdout = original_stdout
-        sys.stderr = original_stderr
-        devnull.close()
+
+# Probed metadata is cached on disk keyed by (path, mtime, size), so repeat
+# probes of an unchanged file skip probing entirely
+METADATA_CACHE_DIR = os.getenv(
+    "METADATA_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "insomnia_meta_cache")
+)
+
+# Probes are mostly waiting on ffprobe processes and header reads
+METADATA_BATCH_WORKERS = 8
+
+def probe_audio_stream(video_path):
+    """
+    Read channel count, sample rate and duration of the first audio stream
+    with ffprobe. Only container and stream headers are parsed.
+    
+    Returns:
+        dict or None: Audio metadata, or None if the video has no audio stream
+    """
+    process = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a:0",
+         "-show_entries", "stream=channels,sample_rate,duration:format=duration",
+         "-of", "json", video_path],
+        capture_output=True, text=True, timeout=15
+    )
+    if process.returncode != 0:
+        raise Exception(f"ffprobe failed: {process.stderr.strip()}")
+
+    probe = json.loads(process.stdout)
+    streams = probe.get("streams") or []
+    if not streams:
+        return None
+
+    stream = streams[0]
+    # Some containers (e.g. Matroska) only report duration at the format level
+    duration = stream.get("duration") or probe.get("format", {}).get("duration") or 0
+    return {
+        "channels": int(stream.get("channels", 0)),
+        "fps": int(stream.get("sample_rate", 0)),
+        "duration": round(float(duration), 3)
+    }
 
 def extract_metadata(video_path):
     """
-    Extract metadata from a video file using moviepy and OpenCV.
+    Extract metadata from a video file using ffprobe (OpenCV as a fallback).
+    Results are cached per (path, mtime, size) in memory and on disk.
     
     Args:
         video_path (str): Path to the video file
@@ -34,53 +69,146 @@ def extract_metadata(video_path):
         dict: Dictionary containing video metadata
     """
     try:
-        # First try to get basic metadata using OpenCV (faster)
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            # Try with MoviePy as a fallback for opening, suppressing its output
-            try:
-                with suppress_stdout_stderr(): # Suppress MoviePy's own console output
-                    with VideoFileClip(video_path, audio=False) as clip_check:
-                        if not clip_check:
-                            raise Exception("Could not open video file with MoviePy either")
-            except Exception as e_moviepy:
-                # Print actual error to our stderr if MoviePy fails
-                print(f"MoviePy check failed: {e_moviepy}", file=sys.__stderr__) # Use original stderr
-                raise Exception(f"Could not open video file with OpenCV or MoviePy")
-
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = frame_count / fps if fps > 0 else 0
-        
-        cap.release()
-        
-        metadata = {
-            "duration": round(duration, 3),
-            "fps": round(fps, 3),
-            "resolution": { "width": width, "height": height },
-            "frame_count": frame_count,
-            "audio": None
-        }
-        
-        # Use MoviePy to get audio information, suppressing its output
-        with suppress_stdout_stderr(): # Suppress MoviePy's own console output
-            with VideoFileClip(video_path, audio=True) as clip:
-                if clip.audio is not None:
-                    metadata["audio"] = {
-                        "channels": clip.audio.nchannels,
-                        "fps": clip.audio.fps,
-                        "duration": round(clip.audio.duration, 3)
-                    }
-        
-        return metadata
+        st = os.stat(video_path)
+        key = (os.path.abspath(video_path), st.st_mtime_ns, st.st_size)
+        # Callers may mutate the result; keep the cached copy pristine
+        return copy.deepcopy(_cached_metadata(key))
     
     except Exception as e:
         # Print the error to the *original* stderr so it's visible in backend logs
         print(f"Error extracting metadata: {str(e)}", file=sys.__stderr__)
         return None
 
+def extract_metadata_batch(video_paths):
+    """
+    Extract metadata for many video files concurrently. Cached files are
+    answered without spawning any probe.
+    
+    Args:
+        video_paths (list): Paths to the video files
+        
+    Returns:
+        dict: Path -> metadata dict (None for files that failed)
+    """
+    paths = list(dict.fromkeys(video_paths))
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(METADATA_BATCH_WORKERS, len(paths))) as pool:
+        return dict(zip(paths, pool.map(extract_metadata, paths)))
+
+@functools.lru_cache(maxsize=256)
+def _cached_metadata(key):
+    """
+    Metadata for a (abspath, mtime_ns, size) key, from the on-disk cache if
+    present, otherwise probed and written there atomically.
+    """
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+    cache_path = os.path.join(METADATA_CACHE_DIR, f"{digest}.json")
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    metadata = _probe_metadata(key[0])
+
+    try:
+        os.makedirs(METADATA_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(metadata, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: could not write metadata cache: {e}", file=sys.__stderr__)
+
+    return metadata
+
+def _parse_rate(rate):
+    """Exact frames per second from an ffprobe rate string like '30000/1001'."""
+    try:
+        value = Fraction(rate)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return 0.0
+    return float(value) if value > 0 else 0.0
+
+def _probe_metadata(video_path):
+    """
+    Read video and audio properties from a single ffprobe header parse,
+    falling back to OpenCV if ffprobe finds no video stream.
+    Raises on failure.
+    """
+    try:
+        process = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_streams", "-show_format",
+             "-of", "json", video_path],
+            capture_output=True, text=True, timeout=15
+        )
+        probe = json.loads(process.stdout) if process.returncode == 0 else {}
+    except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+        print(f"ffprobe failed, falling back to OpenCV: {e}", file=sys.__stderr__)
+        probe = {}
+
+    streams = probe.get("streams") or []
+    video = next((st for st in streams if st.get("codec_type") == "video"), None)
+    if video is None:
+        return _probe_metadata_opencv(video_path)
+
+    format_duration = probe.get("format", {}).get("duration")
+    fps = _parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate"))
+    duration = float(format_duration or video.get("duration") or 0)
+    try:
+        frame_count = int(video["nb_frames"])
+    except (KeyError, ValueError):
+        # Not all containers store a frame count (e.g. Matroska)
+        frame_count = int(round(duration * fps))
+
+    audio = next((st for st in streams if st.get("codec_type") == "audio"), None)
+    if audio is not None:
+        audio_duration = audio.get("duration") or format_duration or 0
+        audio = {
+            "channels": int(audio.get("channels", 0)),
+            "fps": int(audio.get("sample_rate", 0)),
+            "duration": round(float(audio_duration), 3)
+        }
+
+    return {
+        "duration": round(duration, 3),
+        "fps": round(fps, 3),
+        "resolution": { "width": int(video.get("width", 0)), "height": int(video.get("height", 0)) },
+        "frame_count": frame_count,
+        "audio": audio
+    }
+
+def _probe_metadata_opencv(video_path):
+    """
+    Read video properties with OpenCV and audio properties with ffprobe.
+    Raises on failure.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise Exception("Could not open video file with ffprobe or OpenCV")
+
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    duration = frame_count / fps if fps > 0 else 0
+    
+    cap.release()
+    
+    metadata = {
+        "duration": round(duration, 3),
+        "fps": round(fps, 3),
+        "resolution": { "width": width, "height": height },
+        "frame_count": frame_count,
+        "audio": None
+    }
+    
+    # Audio stream details come straight from the container headers
+    metadata["audio"] = probe_audio_stream(video_path)
+    
+    return metadata
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python extract_metadata.py <video_file_path>", file=sys.stderr)